@@ -0,0 +1,114 @@
+"""Benchmarks of creating and saving assets, see harness.py"""
+
+import io
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from harness import benchmark
+
+
+def make_df(rows: int, columns: int = 10) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(rows, columns - 1)), columns=[f'x_{i}' for i in range(columns - 1)])
+    df['group'] = rng.choice(['a_1', 'b & c', 'd%'], rows)
+    return df
+
+
+@benchmark(rows=[10, 1_000, 10_000], engine=['to_latex', 'native'])
+def tex_table(rows: int, engine: str):
+    from texpro import TexTable
+
+    df = make_df(rows)
+    return lambda: TexTable('table', df, engine=engine)
+
+
+@benchmark(repeat=3, models=[4, 16])
+def stargazer_table(models: int):
+    import statsmodels.api as sm
+    from stargazer.stargazer import Stargazer
+    from texpro import StargazerTable
+
+    df = make_df(1_000)
+    fits = [sm.OLS(df['x_0'], sm.add_constant(df[[f'x_{j}' for j in range(1, 2 + i % 8)]])).fit()
+            for i in range(models)]
+    return lambda: StargazerTable('regressions', Stargazer(fits))
+
+
+@benchmark(repeat=3, format=['pdf', 'png', 'svg'])
+def plot_save(format: str):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from texpro import Plot
+
+    fig, ax = plt.subplots()
+    rng = np.random.default_rng(0)
+    ax.scatter(rng.normal(size=5_000), rng.normal(size=5_000), s=2)
+    ax.plot(np.cumsum(rng.normal(size=1_000)))
+    plot = Plot(fig, 'plot', format=format)
+    return plot.save
+
+
+def _png(size: int) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(np.random.default_rng(0).integers(0, 255, (size, size, 3), dtype=np.uint8)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@benchmark(source=['data', 'pil', 'file'])
+def image_save(source: str):
+    from PIL import Image as PILImage
+    from texpro import Image, config
+
+    data = _png(1_000)
+    # Images are not saved automatically
+    if source == 'data':
+        return lambda: Image('image', data=data, format='png').save()
+    if source == 'pil':
+        pil = PILImage.open(io.BytesIO(data))
+        pil.load()
+        return lambda: Image('image', pil=pil, format='png').save()
+    file = config.abspath(config.img_path) / 'source.png'
+    file.write_bytes(data)
+    return lambda: Image('image', file=file).save()
+
+
+@benchmark(repeat=3, kind=['TexSnippet', 'TexEquation', 'SnippetBank'])
+def bulk_snippets(kind: str):
+    import texpro
+
+    values = {f'value{i}': f'{i / 7:.3f}' for i in range(10_000)}
+    if kind == 'SnippetBank':
+        return lambda: texpro.SnippetBank('values', values)
+    asset = getattr(texpro, kind)
+    return lambda: [asset(label, value) for label, value in values.items()]
+
+
+@benchmark(files=[10_000])
+def file_tree(files: int):
+    from texpro import config
+
+    root = config.abspath(config.img_path)
+    for i in range(files):
+        folder = root / f'run_{i // 200}'
+        if i % 200 == 0:
+            folder.mkdir()
+        (folder / f'plot_{i}.png').write_bytes(b'')
+    return lambda: config.file_tree
+
+
+@benchmark()
+def import_texpro():
+    code = 'import time; start = time.perf_counter(); import texpro; print(time.perf_counter() - start)'
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+    def run():
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        return float(output.stdout)
+    return run
@@ -0,0 +1,57 @@
+"""Compares texpro.tabular with DataFrame.to_latex at 1k, 100k and 1M cells.
+
+Run with `python benchmarks/bench_tabular.py`, or as part of harness.py.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from harness import benchmark
+from texpro.tabular import write_tabular
+
+CELLS = [1_000, 100_000, 1_000_000]
+COLUMNS = 10
+
+
+def make_df(cells: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = cells // COLUMNS
+    df = pd.DataFrame(rng.normal(size=(rows, COLUMNS - 2)), columns=[f'x_{i}' for i in range(COLUMNS - 2)])
+    df['n'] = rng.integers(0, 1000, rows)
+    df['group'] = rng.choice(['a_1', 'b & c', 'd%'], rows)
+    return df
+
+
+@benchmark(cells=CELLS[:2])
+def tabular(cells: int):
+    from texpro import config
+
+    df = make_df(cells)
+    path = config.abspath(config.tab_path) / 'table.tex'
+    return lambda: write_tabular(df, path, float_format='%.3f')
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_path:
+        path = Path(tmp_path) / 'table.tex'
+        print(f'{"cells":>10} {"to_latex":>10} {"tabular":>10} {"speedup":>8}')
+        for cells in CELLS:
+            df = make_df(cells)
+            with pd.option_context('styler.render.max_elements', 2 * cells + 1000):
+                to_latex = timed(lambda: path.write_text(df.to_latex(float_format='%.3f')))
+            native = timed(lambda: write_tabular(df, path, float_format='%.3f'))
+            print(f'{cells:>10} {to_latex:>9.3f}s {native:>9.3f}s {to_latex / native:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Runs the benchmarks in benchmarks/bench_*.py and stores their timings as JSON.
+
+A benchmark is a function decorated with @benchmark.  It is called once per combination of its parameters,
+inside a fresh temporary doc_path, and returns the function to time (its own setup is not timed).  If the
+timed function returns a number, that number is recorded instead of its run time (e.g. for measurements made
+in a subprocess).
+
+    python benchmarks/harness.py --output results.json
+    python benchmarks/harness.py -k snippets --compare results.json  # exits with 1 on regressions
+"""
+
+import argparse
+import gc
+import importlib.util
+import itertools
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BENCHMARK_FOLDER = Path(__file__).parent
+sys.path.insert(0, str(BENCHMARK_FOLDER.parent))  # run against this checkout of texpro
+
+
+def benchmark(repeat: int = 5, **params):
+    """Marks a benchmark, e.g. `@benchmark(rows=[100, 10_000])` is run with rows=100 and rows=10000"""
+    def decorator(func):
+        func.benchmark = dict(repeat=repeat, params=params)
+        return func
+    return decorator
+
+
+def _combinations(params: Dict[str, list]) -> List[dict]:
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*(params[name] for name in names))]
+
+
+def _name(module: str, func: Callable, params: dict) -> str:
+    name = f'{module}.{func.__name__}'
+    if params:
+        name += '[' + ','.join(f'{key}={value}' for key, value in params.items()) + ']'
+    return name
+
+
+def discover(pattern: str = '') -> Dict[str, tuple]:
+    """All benchmarks (module.function[params]) whose name contains pattern"""
+    benchmarks = {}
+    for file in sorted(BENCHMARK_FOLDER.glob('bench_*.py')):
+        spec = importlib.util.spec_from_file_location(file.stem, file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for func in vars(module).values():
+            if callable(func) and hasattr(func, 'benchmark'):
+                for params in _combinations(func.benchmark['params']):
+                    name = _name(file.stem, func, params)
+                    if pattern in name:
+                        benchmarks[name] = (func, params)
+    return benchmarks
+
+
+def measure(func: Callable, params: dict, repeat: int) -> dict:
+    import texpro
+
+    with tempfile.TemporaryDirectory() as doc_path:
+        # always render and write, as skipping unchanged assets would only be measured once
+        with texpro.config.override(doc_path=doc_path, skip_unchanged=False, timing=False):
+            texpro.config.make_folders()
+            run = func(**params)
+            times = []
+            for _ in range(repeat):
+                texpro.render_cache.clear()
+                gc.collect()
+                start = time.perf_counter()
+                result = run()
+                elapsed = time.perf_counter() - start
+                times.append(result if isinstance(result, float) else elapsed)
+    return dict(params={key: str(value) for key, value in params.items()}, repeat=repeat,
+                min=min(times), median=statistics.median(times), mean=statistics.mean(times), times=times)
+
+
+def run_all(pattern: str = '', repeat: int = None) -> dict:
+    import texpro
+
+    results = {}
+    for name, (func, params) in discover(pattern).items():
+        try:
+            results[name] = measure(func, params, repeat or func.benchmark['repeat'])
+            print(f'{name:60} {results[name]["median"] * 1000:10.2f} ms', flush=True)
+        except ImportError as e:
+            # e.g. stargazer is not installed
+            results[name] = dict(skipped=str(e))
+            print(f'{name:60} {"skipped":>13} ({e})', flush=True)
+    return dict(texpro_version=texpro.__version__, python=platform.python_version(),
+                platform=platform.platform(), machine=platform.machine(),
+                date=datetime.now(timezone.utc).isoformat(timespec='seconds'), benchmarks=results)
+
+
+def compare(baseline: dict, results: dict, threshold: float = .2) -> List[str]:
+    """The benchmarks whose median time grew by more than threshold (a fraction) since the baseline"""
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        old = baseline['benchmarks'].get(name)
+        if not old or 'median' not in old or 'median' not in result:
+            continue
+        ratio = result['median'] / old['median']
+        if ratio > 1 + threshold:
+            regressions.append(f'{name}: {old["median"] * 1000:.2f} ms -> {result["median"] * 1000:.2f} ms '
+                               f'({ratio:.2f}x)')
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python benchmarks/harness.py')
+    parser.add_argument('-k', dest='pattern', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=None, help='timed runs per benchmark')
+    parser.add_argument('--output', default=None, help='JSON file to store the results in')
+    parser.add_argument('--compare', default=None, help='JSON file of earlier results to compare with')
+    parser.add_argument('--threshold', type=float, default=.2, help='slowdown that counts as a regression')
+    args = parser.parse_args(argv)
+
+    results = run_all(args.pattern, args.repeat)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=1))
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), results, args.threshold)
+        if regressions:
+            print('\nRegressions:\n' + '\n'.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+import texpro
+from texpro import *
+from texpro import flush, wait
+
+
+class AsyncSaveTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        config.async_save = True
+
+    def tearDown(self) -> None:
+        config.async_save = False
+        self.doc_path.cleanup()
+
+    def test_flush(self):
+        for i in range(20):
+            TexEquation(f'test_eq_{i}', 'a_b')
+        texpro.flush()
+        self.assertEqual(len(os.listdir(os.path.join(self.doc_path.name, 'eq'))), 20)
+
+    def test_override(self):
+        # saved with the settings of the context it was created in
+        slides = os.path.join(self.doc_path.name, 'slides')
+        os.mkdir(slides)
+        with config.override(doc_path=slides, eq_path='.'):
+            TexEquation('test_eq', 'a_b')
+        texpro.flush()
+        self.assertTrue(os.path.isfile(os.path.join(slides, 'test_eq.tex')))
+
+    def test_same_label(self):
+        for i in range(20):
+            eq = TexEquation('test_eq', f'a_{i}')
+        texpro.wait()
+        self.assertIn('a_19', eq.path.read_text())
+
+    def test_deferred_error(self):
+        TexEquation('test_eq', 'a_b', folder='does/not/exist')
+        self.assertRaises(IOError, texpro.flush)
+        # errors are only raised once
+        texpro.flush()
@@ -0,0 +1,184 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from texpro import *
+from texpro.build import build_document, dependencies
+
+# stand-in for a LaTeX engine: writes the pdf and an .aux file that is stable from the second run on
+FAKE_ENGINE = '''
+import sys
+from pathlib import Path
+build_folder = sys.argv[1].split('=')[1]
+name = Path(sys.argv[2]).stem
+aux = Path(build_folder) / (name + '.aux')
+runs = int(aux.read_text()) if aux.exists() else 0
+aux.write_text(str(min(runs + 1, 2)))
+(Path(build_folder) / (name + '.pdf')).write_text('pdf')
+'''
+
+DOCUMENT = r'''\documentclass{article}
+\begin{document}
+\input{eq/test_eq}
+% \input{eq/commented_out}
+\includegraphics[width=\linewidth]{img/test_img}
+\end{document}'''
+
+
+class DocumentTestCase(unittest.TestCase):
+    """A document including an equation and an image, built with FAKE_ENGINE"""
+
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        self.document = Path(self.doc_path.name) / 'paper.tex'
+        self.document.write_text(DOCUMENT)
+        self.engine = Path(self.doc_path.name) / 'engine.py'
+        self.engine.write_text(FAKE_ENGINE)
+        self.eq = TexEquation('test_eq', 'a_b')
+        (Path(self.doc_path.name) / 'img' / 'test_img.png').write_bytes(b'png')
+        (Path(self.doc_path.name) / 'eq' / 'commented_out.tex').write_text('')
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def build(self):
+        return build_document(self.document, engine=sys.executable, engine_args=(str(self.engine),))
+
+
+class BuildTestSuite(DocumentTestCase):
+    def test_dependencies(self):
+        names = {path.name for path in dependencies(self.document)}
+        self.assertEqual(names, {'test_eq.tex', 'test_img.png'})
+
+    def test_incremental_build(self):
+        result = self.build()
+        self.assertTrue(result.compiled)
+        self.assertEqual(result.runs, 3)  # aux changes twice, then is stable
+        self.assertTrue(os.path.exists(os.path.join(self.doc_path.name, 'paper.pdf')))
+
+        # nothing changed
+        self.assertFalse(self.build().compiled)
+
+        # changed asset
+        TexEquation('test_eq', 'a_c')
+        self.assertTrue(self.build().compiled)
+
+
+class WatchTestSuite(DocumentTestCase):
+    def watcher(self):
+        from texpro.watch import Watcher
+        return Watcher([self.document], interval=.01, debounce=.05, engine=sys.executable,
+                       engine_args=(str(self.engine),))
+
+    def test_rebuild_on_change(self):
+        self.build()
+        watcher = self.watcher()
+        self.assertEqual(watcher.check(timeout=.1), {})  # nothing changed
+
+        # a burst of changes -> one build
+        TexEquation('test_eq', 'a_c')
+        (Path(self.doc_path.name) / 'img' / 'test_img.png').write_bytes(b'new png')
+        results = watcher.check(timeout=1)
+        self.assertEqual(list(results), [self.document])
+        self.assertTrue(results[self.document].compiled)
+
+    def test_unrelated_change(self):
+        self.build()
+        watcher = self.watcher()
+        TexEquation('other_eq', 'a_b')
+        self.assertEqual(watcher.check(timeout=.5), {})
+
+    def test_new_dependency(self):
+        self.build()
+        watcher = self.watcher()
+        self.document.write_text(DOCUMENT.replace('commented_out', 'new_eq').replace('% ', ''))
+        TexEquation('new_eq', 'x')
+        self.assertTrue(watcher.check(timeout=1)[self.document].compiled)
+
+        TexEquation('new_eq', 'y')
+        self.assertTrue(watcher.check(timeout=1)[self.document].compiled)
+
+    def test_created_dependency(self):
+        self.document.write_text(DOCUMENT.replace(r'\end{document}', '\\input{tab/results}\n\\end{document}'))
+        self.build()
+        watcher = self.watcher()
+        self.assertEqual(watcher.check(timeout=.1), {})
+        (Path(self.doc_path.name) / 'tab' / 'results.tex').write_text('table')
+        self.assertTrue(watcher.check(timeout=1)[self.document].compiled)
+
+
+def fake_run_notebook(notebook, kernel, allow_errors):
+    """Stand-in for utils.run_notebook: counts the runs and logs an asset like texpro does in a kernel"""
+    from texpro.manifest import ASSET_LOG_VARIABLE
+    with open(notebook.with_suffix('.runs'), 'a') as runs:
+        runs.write('run\n')
+    with open(os.environ[ASSET_LOG_VARIABLE], 'a') as log:
+        log.write(str(notebook.with_suffix('.tex')) + '\n')
+
+
+class RunnerTestSuite(unittest.TestCase):
+    def test_notebook_hash(self):
+        import json
+        from texpro.runner import notebook_hash
+
+        with tempfile.TemporaryDirectory() as tmp_path:
+            notebook = Path(tmp_path) / 'test.ipynb'
+            data = Path(tmp_path) / 'data.csv'
+            data.write_text('a,b')
+            cell = {'cell_type': 'code', 'source': ['x = 1'], 'outputs': []}
+            notebook.write_text(json.dumps({'cells': [cell]}))
+            original = notebook_hash(notebook, 'python3', [data])
+
+            # outputs are ignored
+            cell['outputs'] = [{'output_type': 'stream', 'text': '1'}]
+            notebook.write_text(json.dumps({'cells': [cell]}))
+            self.assertEqual(notebook_hash(notebook, 'python3', [data]), original)
+
+            # data and source are not
+            data.write_text('a,c')
+            self.assertNotEqual(notebook_hash(notebook, 'python3', [data]), original)
+            cell['source'] = ['x = 2']
+            notebook.write_text(json.dumps({'cells': [cell]}))
+            self.assertNotEqual(notebook_hash(notebook, 'python3', [data]), original)
+
+    def test_run_notebooks(self):
+        import json
+        from unittest import mock
+        from texpro.runner import run_notebooks
+
+        with tempfile.TemporaryDirectory() as tmp_path, \
+                mock.patch('texpro.runner.run_notebook', fake_run_notebook):
+            notebooks = [Path(tmp_path) / f'{name}.ipynb' for name in ('a', 'b')]
+            for notebook in notebooks:
+                notebook.write_text(json.dumps({'cells': [{'cell_type': 'code', 'source': notebook.stem}]}))
+            data = Path(tmp_path) / 'data.csv'
+            data.write_text('a,b')
+            state_file = Path(tmp_path) / 'runs.json'
+
+            def run(**kwargs):
+                # workers=1 runs in this process, so that run_notebook is patched with any start method
+                return run_notebooks(notebooks, data=[data], workers=1, state_file=state_file, **kwargs)
+
+            def runs(notebook):
+                return len(notebook.with_suffix('.runs').read_text().splitlines())
+
+            results = run()
+            self.assertTrue(all(result.executed for result in results.values()))
+            self.assertEqual(results[notebooks[0]].assets, [str(notebooks[0].with_suffix('.tex'))])
+
+            # unchanged -> skipped, with the assets of the last run
+            results = run()
+            self.assertFalse(any(result.executed for result in results.values()))
+            self.assertEqual(results[notebooks[1]].assets, [str(notebooks[1].with_suffix('.tex'))])
+            self.assertEqual([runs(notebook) for notebook in notebooks], [1, 1])
+
+            # changed data or force -> executed again
+            data.write_text('a,c')
+            run()
+            self.assertEqual([runs(notebook) for notebook in notebooks], [2, 2])
+            run(force=True)
+            self.assertEqual([runs(notebook) for notebook in notebooks], [3, 3])
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from texpro import *
+from texpro import load_cache, preload, render_cache
+from texpro.cache import LoadCache, RenderCache
+
+
+class RenderCacheTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = RenderCache()
+        self.orig_size = config.render_cache_size
+        self.orig_template = config.tab_template
+
+    def tearDown(self) -> None:
+        config.render_cache_size = self.orig_size
+        config.tab_template = self.orig_template
+
+    def test_hits_and_misses(self):
+        self.assertEqual(self.cache.get('a', lambda: 'A'), 'A')
+        self.assertEqual(self.cache.get('a', lambda: 'other'), 'A')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        # None keys are never cached
+        self.cache.get(None, lambda: 'B')
+        self.cache.get(None, lambda: 'B')
+        self.assertEqual(self.cache.misses, 3)
+
+    def test_lru(self):
+        config.render_cache_size = 2
+        self.cache.get('a', lambda: 'A')
+        self.cache.get('b', lambda: 'B')
+        self.cache.get('a', lambda: 'A')  # a is now most recently used
+        self.cache.get('c', lambda: 'C')  # evicts b
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get('b', lambda: 'new'), 'new')
+
+    def test_template_change(self):
+        import pandas as pd
+
+        with config.override(auto_save=False):
+            table = TexTable('test_tab', pd.DataFrame({'a': [1, 2]}))
+        self.assertIn(r'\caption{}', table.tex)
+        hits, misses = render_cache.hits, render_cache.misses
+
+        # keys include the template, so switching back (e.g. between documents) renders nothing again
+        config.tab_template = '{table}'
+        self.assertEqual(table.tex, table.df.to_latex())
+        self.assertEqual(render_cache.misses, misses + 1)
+        config.tab_template = self.orig_template
+        self.assertIn(r'\caption{}', table.tex)
+        self.assertEqual((render_cache.hits, render_cache.misses), (hits + 1, misses + 1))
+
+
+class LoadCacheTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        self.cache = LoadCache()
+        self.orig_size = config.load_cache_size
+        self.folder = Path(self.doc_path.name)
+
+    def tearDown(self) -> None:
+        config.load_cache_size = self.orig_size
+        load_cache.clear()
+        self.doc_path.cleanup()
+
+    def test_validation(self):
+        file = self.folder / 'a.tex'
+        file.write_text('first')
+        self.assertEqual(self.cache.read_text(file), 'first')
+        self.assertEqual(self.cache.read_text(self.folder / '.' / 'a.tex'), 'first')  # same resolved path
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        # changed on disk -> read again
+        file.write_text('second\r\n')
+        self.assertEqual(self.cache.read_text(file), 'second\n')
+        self.assertEqual(self.cache.misses, 2)
+        stat = file.stat()
+        file.write_text('fourth\r\n')
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # same size and mtime: not noticed
+        self.assertEqual(self.cache.read_text(file), 'second\n')
+
+    def test_budget(self):
+        config.load_cache_size = 400
+        for name in 'abcd':
+            (self.folder / name).write_bytes(name.encode() * 100)
+        self.cache.read(self.folder / 'a')
+        self.cache.read(self.folder / 'b')
+        self.cache.read(self.folder / 'a')  # a is now most recently used
+        self.cache.read(self.folder / 'c')
+        self.cache.read(self.folder / 'd')
+        self.assertEqual(self.cache.bytes, 400)
+        (self.folder / 'e').write_bytes(b'e' * 100)
+        self.cache.read(self.folder / 'e')  # evicts b
+        self.assertEqual(self.cache.info()['size'], 4)
+        misses = self.cache.misses
+        self.cache.read(self.folder / 'a')
+        self.cache.read(self.folder / 'b')
+        self.assertEqual(self.cache.misses, misses + 1)
+
+        # too large for the cache
+        (self.folder / 'large').write_bytes(b'x' * 101)
+        self.assertEqual(self.cache.read(self.folder / 'large', lambda path: b'fallback'), b'fallback')
+        self.assertEqual(self.cache.bytes, 400)
+
+    def test_preload(self):
+        for i in range(20):
+            TexSnippet(f'snippet_{i}', str(i))
+        load_cache.clear()
+        self.assertEqual(preload('config.snip_path', '*.tex'), 20)
+        self.assertEqual(preload('config.snip_path', '*.tex'), 0)  # already cached
+        misses = load_cache.misses
+        self.assertEqual([TexSnippet(f'snippet_{i}').tex for i in range(20)], [f'{i}%' for i in range(20)])
+        self.assertEqual(load_cache.misses, misses)
+
+        TexSnippet('snippet_3', 'changed')
+        self.assertEqual(TexSnippet('snippet_3').tex, 'changed%')
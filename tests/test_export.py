@@ -0,0 +1,101 @@
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from texpro import *
+from texpro import batch, export_plots, write_stats
+
+
+class FakeFigure:
+    """Picklable stand-in for a matplotlib figure"""
+
+    def __init__(self, content: str):
+        self.content = content
+
+    def savefig(self, file, format, **kwargs):
+        if self.content == 'fail':
+            raise ValueError('cannot render')
+        file.write(f'{format}:{self.content}'.encode())
+
+
+class UnpicklableFigure(FakeFigure):
+    def __init__(self, content: str):
+        super().__init__(content)
+        self.callback = lambda: None
+
+
+class ExportPlotsTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def test_export_plots(self):
+        plots = [Plot(FakeFigure(str(i)), f'plot_{i}', savefig_args={}) for i in range(4)]
+        plots.append(Plot(UnpicklableFigure('local'), 'plot_local', savefig_args={}))
+        figure = TexFigure('plot_fig', Plot(FakeFigure('fig'), savefig_args={}))
+        failing = Plot(FakeFigure('fail'), 'plot_fail', savefig_args={})
+
+        errors = export_plots(plots + [figure, failing], workers=2)
+        self.assertEqual(list(errors), [failing])
+        self.assertIsInstance(errors[failing], ValueError)
+
+        img_path = os.path.join(self.doc_path.name, 'img')
+        self.assertEqual(plots[3].path.read_bytes(), b'pdf:3')
+        self.assertEqual(plots[4].path.read_bytes(), b'pdf:local')
+        self.assertTrue(os.path.exists(os.path.join(img_path, 'plot_fig.pdf')))
+        self.assertTrue(os.path.exists(os.path.join(self.doc_path.name, 'fig', 'plot_fig.tex')))
+
+
+class BatchTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def test_batch(self):
+        write_stats.reset()
+        with batch() as current:
+            for i in range(3):
+                eq = TexEquation('test_eq', f'a_{i}')
+            TexSnippet('test_snip', '42')
+            # nothing saved yet
+            self.assertFalse(os.path.exists(os.path.join(self.doc_path.name, 'eq')))
+            self.assertEqual(len(current), 2)
+
+        # folders are created, only the last version is written
+        self.assertIn('a_2', eq.path.read_text())
+        self.assertEqual(write_stats.written, 2)
+
+    def test_batch_error(self):
+        # an error inside the block is raised, and nothing is saved
+        with self.assertRaises(KeyError):
+            with batch():
+                eq = TexEquation('test_eq', 'a')
+                raise KeyError('test')
+        self.assertFalse(eq.path.exists())
+
+    def test_batch_override(self):
+        with tempfile.TemporaryDirectory() as other_path:
+            with batch():
+                with config.override(doc_path=other_path):
+                    TexSnippet('test_snip', 'other')
+                TexSnippet('test_snip', 'here')
+            # saved where each was created
+            self.assertEqual(Path(other_path, 'test_snip.tex').read_text(), 'other%')
+        self.assertEqual(Path(self.doc_path.name, 'test_snip.tex').read_text(), 'here%')
+
+    def test_batch_other_thread(self):
+        with batch() as current:
+            thread = threading.Thread(target=TexSnippet, args=('test_snip', '42'))
+            thread.start()
+            thread.join()
+            self.assertEqual(len(current), 0)  # saved by the other thread right away
+        self.assertTrue(os.path.exists(os.path.join(self.doc_path.name, 'test_snip.tex')))
@@ -0,0 +1,132 @@
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from texpro import *
+from texpro import Image, fetch
+
+from tests.test_texassets import PNG_DATA
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """Serves /<name>.png with an ETag, answering 304 if it matches"""
+    files = {}
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get('If-None-Match')))
+        body = self.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchTestSuite(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        self.cache = tempfile.TemporaryDirectory()
+        self.old_cache_path = config.url_cache_path
+        config.url_cache_path = self.cache.name
+        fetch._validated.clear()
+        ImageHandler.files = {f'/image{i}.png': PNG_DATA + bytes([i]) for i in range(20)}
+        ImageHandler.requests.clear()
+
+    def tearDown(self) -> None:
+        config.url_cache_path = self.old_cache_path
+        self.doc_path.cleanup()
+        self.cache.cleanup()
+
+    def test_image_url(self):
+        url = f'{self.base_url}/image1.png'
+        image = Image('remote', url=url)
+        image.save()
+        self.assertEqual(image.path.read_bytes(), PNG_DATA + bytes([1]))
+        self.assertEqual(image.path.name, 'remote.png')
+
+        # cached: not requested again in this session, revalidated in the next one
+        Image('remote', url=url)
+        self.assertEqual(len(ImageHandler.requests), 1)
+        fetch._validated.clear()
+        Image('remote', url=url)
+        self.assertEqual(len(ImageHandler.requests), 2)
+        self.assertIsNotNone(ImageHandler.requests[1][1])  # If-None-Match
+
+        # changed on the server
+        fetch._validated.clear()
+        ImageHandler.files['/image1.png'] = PNG_DATA + b'new'
+        Image('remote', url=url).save()
+        self.assertEqual(image.path.read_bytes(), PNG_DATA + b'new')
+
+    def test_prefetch(self):
+        urls = [f'{self.base_url}/image{i}.png' for i in range(20)] + [f'{self.base_url}/missing.png']
+        with self.assertWarns(UserWarning):
+            results = fetch.prefetch(urls, workers=8)
+        self.assertEqual(sum(isinstance(result, Path) for result in results.values()), 20)
+        for i in range(20):
+            Image(f'image{i}', url=urls[i])
+        self.assertEqual(len(ImageHandler.requests), 21)
+
+    def test_eviction(self):
+        for i in range(10):
+            fetch.fetch(f'{self.base_url}/image{i}.png')
+        fetch.evict(max_bytes=3 * (len(PNG_DATA) + 1))
+        cached = [path for path in Path(self.cache.name).iterdir() if path.suffix == '.json']
+        self.assertEqual(len(cached), 3)
+
+        # the least recently used are removed
+        fetch.fetch(f'{self.base_url}/image7.png')
+        fetch.evict(max_bytes=1 * (len(PNG_DATA) + 1))
+        self.assertEqual(len(list(Path(self.cache.name).glob('*-content.png'))), 1)
+        self.assertTrue(fetch._read_entry(f'{self.base_url}/image7.png'))
+
+        # a batch is evicted once, after all of its files were fetched
+        urls = [f'{self.base_url}/image{i}.png' for i in range(5)]
+        with config.override(url_cache_size=len(PNG_DATA) + 1):
+            results = fetch.fetch_many(urls)
+        self.assertTrue(all(path.is_file() for path in results.values()))
+
+    def test_pinned(self):
+        # the files of images are kept until they are saved
+        with config.override(url_cache_size=len(PNG_DATA) + 1):
+            image = Image('remote', url=f'{self.base_url}/image0.png')
+            for i in range(1, 4):
+                fetch.fetch(f'{self.base_url}/image{i}.png')
+            self.assertEqual(image.save().path.read_bytes(), PNG_DATA + bytes([0]))
+
+            del image
+            fetch.evict()
+        self.assertFalse(fetch._read_entry(f'{self.base_url}/image0.png'))
+
+
+if __name__ == '__main__':
+    unittest.main()
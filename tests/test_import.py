@@ -0,0 +1,38 @@
+import subprocess
+import sys
+import unittest
+
+IMPORT_BUDGET = 0.3  # seconds
+
+MEASURE_IMPORT = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+print(','.join(sorted(name for name in ('IPython', 'pandas', 'matplotlib', 'PIL', 'plotly', 'stargazer')
+                      if name in sys.modules)))
+'''
+
+
+class ImportTestSuite(unittest.TestCase):
+    def test_import_time(self):
+        for statement in ('import texpro', 'from texpro import *'):
+            # run in a fresh interpreter, so nothing is imported yet
+            output = subprocess.run([sys.executable, '-c', MEASURE_IMPORT.format(statement=statement)],
+                                    stdout=subprocess.PIPE, text=True, check=True).stdout.split('\n')
+            self.assertLess(float(output[0]), IMPORT_BUDGET, statement)
+            self.assertEqual(output[1], '', f'heavy modules imported by `{statement}`')
+
+    def test_star_import(self):
+        namespace = {}
+        exec('from texpro import *', namespace)
+        self.assertIn('TexTable', namespace)
+        for name in ('Image', 'stats', 'build', 'batch', 'registry'):
+            self.assertNotIn(name, namespace)
+
+    def test_lazy_image(self):
+        import IPython
+        import texpro
+        from texpro.texassets import Image
+        self.assertIs(texpro.Image, Image)
+        self.assertTrue(issubclass(texpro.Image, IPython.display.Image))
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+from texpro import *
+from texpro import write_stats
+from texpro.manifest import get_manifest, save_manifests
+
+
+class ManifestTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        write_stats.reset()
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def test_skip_unchanged(self):
+        eq = TexEquation('test_eq', 'a_b')
+        mtime = os.stat(eq.path).st_mtime_ns
+
+        # same content -> not written again
+        TexEquation('test_eq', 'a_b')
+        self.assertEqual(os.stat(eq.path).st_mtime_ns, mtime)
+        self.assertEqual(write_stats.written, 1)
+        self.assertEqual(write_stats.skipped, 1)
+
+        # changed content -> written
+        TexEquation('test_eq', 'a_c')
+        self.assertIn('a_c', eq.path.read_text())
+        self.assertEqual(write_stats.written, 2)
+
+    def test_manifest_file(self):
+        eq = TexEquation('test_eq', 'a_b')
+        self.assertTrue(os.path.exists(os.path.join(self.doc_path.name, '.texpro-manifest.json')))
+        self.assertIn('eq/test_eq.tex', get_manifest().entries)
+
+        # modified outside of texpro -> rewritten
+        eq.path.write_text('edited by hand')
+        eq.save()
+        self.assertEqual(write_stats.written, 2)
+        self.assertIn('a_b', eq.path.read_text())
+
+    def test_disabled(self):
+        config.skip_unchanged = False
+        try:
+            TexEquation('test_eq', 'a_b')
+            TexEquation('test_eq', 'a_b')
+            self.assertEqual(write_stats.written, 2)
+            self.assertEqual(write_stats.skipped, 0)
+        finally:
+            config.skip_unchanged = True
+
+    def test_deferred_save(self):
+        # many writes in a row -> the manifest is saved once, then after SAVE_INTERVAL (or at exit)
+        for i in range(50):
+            TexEquation(f'test_eq_{i}', 'a_b')
+        manifest = get_manifest()
+        self.assertTrue(manifest.pending)
+        save_manifests()
+        self.assertFalse(manifest.pending)
+        with open(manifest.file) as file:
+            self.assertEqual(len(json.load(file)), 50)
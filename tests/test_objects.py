@@ -0,0 +1,85 @@
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from texpro import *
+from texpro import Image, write_stats
+from texpro.objects import gc, object_folder
+
+from tests.test_texassets import PNG_DATA
+
+
+class ObjectStoreTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        config.object_store = True
+
+    def tearDown(self) -> None:
+        config.object_store = False
+        self.doc_path.cleanup()
+
+    def test_deduplicate(self):
+        os.mkdir(os.path.join(self.doc_path.name, 'appendix'))
+        logo = Image('logo', data=PNG_DATA, format='png').save()
+        copy = Image('logo', data=PNG_DATA, format='png', folder='appendix').save()
+        blobs = os.listdir(object_folder())
+        self.assertEqual(len(blobs), 1)
+        self.assertEqual(logo.path.read_bytes(), PNG_DATA)
+        self.assertTrue(os.path.samefile(logo.path, copy.path))
+
+        # unchanged -> nothing written
+        write_stats.reset()
+        Image('logo', data=PNG_DATA, format='png').save()
+        self.assertEqual(write_stats.skipped, 1)
+
+    def test_file(self):
+        source = Path(self.doc_path.name) / 'source.png'
+        source.write_bytes(PNG_DATA)
+        image = Image('scan', file=source).save()
+        Image('logo', data=PNG_DATA, format='png').save()
+        self.assertTrue(os.path.samefile(image.path, config.abspath(Path('img/logo.png'))))
+        self.assertFalse(os.path.samefile(image.path, source))
+
+    def test_read_only(self):
+        logo = Image('logo', data=PNG_DATA, format='png').save()
+        self.assertFalse(logo.path.stat().st_mode & stat.S_IWUSR)  # a hardlink to the blob
+
+        # copies are writable
+        with mock.patch('os.link', side_effect=OSError), mock.patch('texpro.objects._reflink', side_effect=OSError):
+            copy = Image('copy', data=PNG_DATA, format='png').save()
+        self.assertTrue(copy.path.stat().st_mode & stat.S_IWUSR)
+
+        # read-only files are replaced also where that is not allowed (Windows)
+        replace = os.replace
+
+        def strict_replace(source, target):
+            if os.path.exists(target) and not os.stat(target).st_mode & stat.S_IWUSR:
+                raise PermissionError(target)
+            replace(source, target)
+
+        with mock.patch('os.replace', strict_replace):
+            Image('logo', data=PNG_DATA + b'changed', format='png').save()
+        self.assertEqual(logo.path.read_bytes(), PNG_DATA + b'changed')
+
+    def test_gc(self):
+        logo = Image('logo', data=PNG_DATA, format='png').save()
+        Image('logo', data=PNG_DATA + b'changed', format='png').save()
+        self.assertEqual(len(os.listdir(object_folder())), 2)
+
+        result = gc(dry_run=True)
+        self.assertEqual((result.removed, result.kept), (1, 1))
+        self.assertEqual(len(os.listdir(object_folder())), 2)
+
+        result = gc()
+        self.assertEqual(result.bytes_reclaimed, len(PNG_DATA))
+        self.assertEqual(os.listdir(object_folder()), [os.listdir(object_folder())[0]])
+        self.assertEqual(logo.path.read_bytes(), PNG_DATA + b'changed')
+
+
+if __name__ == '__main__':
+    unittest.main()
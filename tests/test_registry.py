@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+from texpro import *
+from texpro import Image, registry
+from texpro.registry import DuplicateLabelWarning
+
+from tests.test_texassets import PNG_DATA
+
+
+class RegistryTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        registry.clear()
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def test_find(self):
+        eq = TexEquation('test_eq', 'a_b')
+        TexSnippet('test_snippet', 'text')
+
+        self.assertIn(eq.path, registry)
+        self.assertIs(registry.get(eq.path).get_asset(), eq)
+        self.assertEqual([record.path for record in registry.find(label='test_eq')], [str(eq.path)])
+        self.assertEqual(len(registry.find(tex_label='eq:test_eq')), 1)
+        self.assertEqual(len(registry.find(type='TexSnippet')), 1)
+        self.assertEqual(registry.find(label='test_eq', type='TexSnippet'), [])
+
+    def test_image(self):
+        image = Image('logo', data=PNG_DATA, format='png')
+        self.assertEqual([record.path for record in registry.find(type='Image')], [str(image.path)])
+        self.assertTrue(str(image.path).endswith(os.path.join('img', 'logo.png')))
+
+    def test_rerun_does_not_warn(self):
+        TexEquation('test_eq', 'a_b')
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DuplicateLabelWarning)
+            TexEquation('test_eq', 'a_c')
+        self.assertEqual(len(registry), 1)
+
+    def test_duplicate_tex_label(self):
+        TexEquation('test_eq', 'a_b')
+        os.mkdir(os.path.join(self.doc_path.name, 'other'))
+        with self.assertWarns(DuplicateLabelWarning):
+            TexEquation('test_eq', 'a_b', folder='other')
+        self.assertEqual(len(registry.duplicates), 1)
+
+    def test_other_origin(self):
+        eq = TexEquation('test_eq', 'a_b')
+        registry.save()
+        registry.clear()
+
+        with mock.patch.dict(os.environ, JPY_SESSION_NAME='other.ipynb'):
+            with self.assertWarns(DuplicateLabelWarning):
+                TexEquation('test_eq', 'a_c')
+        self.assertEqual(registry.get(eq.path).origin, 'other.ipynb')
+
+    def test_save_load(self):
+        eq = TexEquation('test_eq', 'a_b')
+        registry.save()
+        index_file = os.path.join(self.doc_path.name, config.index_file)
+        entries = json.loads(open(index_file).read())
+        self.assertEqual([entry['label'] for entry in entries], ['test_eq'])
+
+        registry.clear()
+        registry.load()
+        record = registry.get(eq.path)
+        self.assertEqual(record.tex_label, 'eq:test_eq')
+        self.assertIsNone(record.get_asset())
+
+    def test_save_merges(self):
+        TexEquation('test_eq', 'a_b')
+        index_file = os.path.join(self.doc_path.name, config.index_file)
+
+        # another process saves the index file in the meantime
+        other = {'type': 'TexSnippet', 'label': 'other', 'tex_label': None, 'origin': 'other.ipynb',
+                 'path': os.path.join(os.path.realpath(self.doc_path.name), 'other.tex')}
+        with open(index_file, 'w') as file:
+            json.dump([other], file)
+        registry.save()
+        entries = json.loads(open(index_file).read())
+        self.assertEqual(sorted(entry['label'] for entry in entries), ['other', 'test_eq'])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
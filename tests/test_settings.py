@@ -1,6 +1,9 @@
+import asyncio
 import os
 import tempfile
+import threading
 import unittest
+from pathlib import Path
 
 from texpro import *
 
@@ -79,6 +82,73 @@ class PathTestSuite(unittest.TestCase):
             # test file tree
             self.assertEqual(config.file_tree, TEST_FILE_TREE.format(dir=tmp_doc_path))
 
+    def test_file_tree_options(self):
+        with tempfile.TemporaryDirectory() as tmp_doc_path:
+            config.doc_path = tmp_doc_path
+            config.make_folders()
+            for i in range(5):
+                with open(os.path.join(tmp_doc_path, 'img', f'plot{i}.png'), 'wb') as file:
+                    file.write(b'x' * 1000)
+            os.makedirs(os.path.join(tmp_doc_path, '.tex-build'))
+
+            # ignored folders, collapsed directories and left out entries are summarized
+            lines = list(config.iter_file_tree(max_depth=0))
+            self.assertNotIn('.tex-build', '\n'.join(lines))
+            self.assertIn('├── img [png: 5 files, 5.0 kB]', lines)
+            lines = list(config.iter_file_tree(max_entries=4))
+            self.assertIn('│   └── ... 1 more [png: 1 file, 1.0 kB]', lines)
+
+            tree = config.file_tree_dict(max_entries=4)
+            img = next(child for child in tree['children'] if child['name'] == 'img')
+            self.assertEqual(img['summary'], {'png': {'files': 5, 'bytes': 5000}})
+            self.assertEqual(img['more'], 1)
+            self.assertEqual(img['children'][0], {'name': 'plot0.png', 'type': 'file', 'bytes': 1000})
+
+    def test_file_tree_url_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_doc_path:
+            config.doc_path = tmp_doc_path
+            os.makedirs(os.path.join(tmp_doc_path, 'urls'))
+            os.makedirs(os.path.join(tmp_doc_path, 'cache', 'urls'))
+
+            # only the url cache is left out, if it is inside doc_path
+            self.assertIn('urls', config.file_tree.split('\n')[-1])
+            with config.override(url_cache_path=Path(tmp_doc_path, 'cache', 'urls')):
+                self.assertEqual(config.file_tree.split('\n')[1:], ['├── cache', '└── urls'])
+
+    def test_override(self):
+        with tempfile.TemporaryDirectory() as tmp_doc_path:
+            config.doc_path = tmp_doc_path
+            os.mkdir(os.path.join(tmp_doc_path, 'slides'))
+            with config.override(doc_path=os.path.join(tmp_doc_path, 'slides'), eq_prefix='e:'):
+                self.assertEqual(config.doc_path, Path(tmp_doc_path) / 'slides')
+                self.assertEqual(config.abspath(Path('eq')), Path(tmp_doc_path) / 'slides' / 'eq')
+                self.assertEqual(TexEquation('test_eq', 'a_b', folder='.').tex_label, 'e:test_eq')
+
+                # other threads keep the global settings
+                seen = []
+                thread = threading.Thread(target=lambda: seen.append(config.doc_path))
+                thread.start()
+                thread.join()
+                self.assertEqual(seen, [Path(tmp_doc_path)])
+            self.assertEqual(config.doc_path, Path(tmp_doc_path))
+            self.assertEqual(config.abspath(Path('eq')), Path(tmp_doc_path) / 'eq')
+            self.assertEqual(config.eq_prefix, 'eq:')
+
+            with self.assertRaises(AttributeError):
+                with config.override(nonsense=1):
+                    pass
+
+    def test_override_tasks(self):
+        async def export(name):
+            with config.override(doc_path=name):
+                await asyncio.sleep(.01)
+                return config.doc_path
+
+        async def main():
+            return await asyncio.gather(*(export(name) for name in ('paper', 'slides')))
+
+        self.assertEqual(asyncio.run(main()), [Path('paper'), Path('slides')])
+
     def test_set_paths(self):
         ...
         # custom path if doc_path not set
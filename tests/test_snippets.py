@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from texpro import *
+from texpro import SnippetBank, write_stats
+
+
+class SnippetBankTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        write_stats.reset()
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def test_macros(self):
+        bank = SnippetBank('numbers', {'n_obs': 1234, 'beta': 0.12345, 'p': np.nan, 'name': r'50\%'})
+        tex = bank.path.read_text()
+        self.assertEqual(bank.path, config.abspath(config.snip_path) / 'numbers.tex')
+        self.assertIn(r'\newcommand\numbers[1]{', tex)
+        self.assertIn(r'\expandafter\def\csname numbers@n_obs\endcsname{1234}%', tex)
+        self.assertIn(r'\expandafter\def\csname numbers@beta\endcsname{0.123}%', tex)
+        self.assertIn(r'\expandafter\def\csname numbers@p\endcsname{}%', tex)
+        self.assertIn(r'\expandafter\def\csname numbers@name\endcsname{50\%}%', tex)
+
+    def test_dataframe(self):
+        df = pd.DataFrame({'coef': [0.5, -1.25], 'se': [0.1, 0.2]}, index=['x1', 'x2'])
+        bank = SnippetBank('reg', df, float_format='%.2f')
+        self.assertEqual(bank['x2_coef'], '-1.25')
+        self.assertEqual(len(bank), 4)
+
+    def test_update(self):
+        bank = SnippetBank('numbers', {'a': 1, 'b': 2})
+        bank.update({'a': 1})
+        self.assertEqual(write_stats.written, 1)  # unchanged -> not even rendered again
+
+        # loaded from the file, then only some values changed
+        bank = SnippetBank('numbers').update({'b': 3, 'c': 4.})
+        self.assertEqual(SnippetBank('numbers').values, {'a': '1', 'b': '3', 'c': '4.000'})
+        self.assertEqual(write_stats.written, 2)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, SnippetBank, 'numbers_1', {'a': 1})
+        self.assertRaises(ValueError, SnippetBank, 'numbers', {'a b': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
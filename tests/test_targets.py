@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from texpro import *
+from texpro import batch, registry, render_cache, save_to
+
+
+class CountingFigure:
+    """Stand-in for a matplotlib figure, counting how often it is rendered"""
+
+    def __init__(self):
+        self.renders = 0
+
+    def savefig(self, file, format, **kwargs):
+        self.renders += 1
+        file.write(f'{format}:{self.renders}'.encode())
+
+
+class FakeStargazer:
+    """Stand-in for a Stargazer table"""
+
+    def render_latex(self):
+        return '\\begin{table}\n\\begin{tabular}{c}\nx\n\\end{tabular}\n\\end{table}'
+
+
+class TargetsTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        self.root = Path(self.doc_path.name)
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        render_cache.clear()
+        registry.clear()
+        self.targets = [self.root / 'paper', {'doc_path': self.root / 'slides', 'tab_template': '{table}'},
+                        self.root / 'poster']
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def test_save_to(self):
+        df = pd.DataFrame({'a': [1, 2], 'b': [.5, .25]})
+        with config.override(auto_save=False):
+            table = TexTable('test_tab', df)
+        misses = render_cache.misses
+        table.save_to(*self.targets)
+        self.assertEqual(render_cache.misses, misses + 2)  # once per template
+        hits = render_cache.hits
+        table.save_to(*self.targets)
+        self.assertEqual(render_cache.misses, misses + 2)
+        self.assertEqual(render_cache.hits, hits + 2)
+
+        paper, slides, poster = (self.root / name / 'tab' / 'test_tab.tex' for name in ('paper', 'slides', 'poster'))
+        self.assertEqual(paper.read_text(), poster.read_text())
+        self.assertIn(r'\caption{}', paper.read_text())
+        self.assertEqual(slides.read_text(), df.to_latex())
+        self.assertFalse(table.path.exists())
+        self.assertEqual(len(registry.find(label='test_tab')), 1 + 3)  # where it was created, and the targets
+
+        figure = CountingFigure()
+        with config.override(auto_save=False):
+            tex_figure = TexFigure('test_fig', Plot(figure, savefig_args={}, format='png'))
+        save_to([tex_figure], self.targets)
+        self.assertEqual(figure.renders, 1)  # the template of tables does not matter
+        for name in ('paper', 'slides', 'poster'):
+            self.assertEqual((self.root / name / 'img' / 'test_fig.png').read_bytes(), b'png:1')
+            self.assertIn('img/test_fig.png', (self.root / name / 'fig' / 'test_fig.tex').read_text())
+
+    def test_stargazer(self):
+        with config.override(auto_save=False):
+            table = StargazerTable('test_reg', FakeStargazer())
+        self.assertEqual(table.save_to(*self.targets), table)
+        paper, slides = (self.root / name / 'tab' / 'test_reg.tex' for name in ('paper', 'slides'))
+        self.assertIn(r'\caption{}', paper.read_text())
+        self.assertEqual(slides.read_text(), '\\begin{tabular}{c}\nx\n\\end{tabular}')
+
+    def test_auto_save(self):
+        with config.override(targets=tuple(self.targets)):
+            TexSnippet('test_snip', 'value')
+            with batch():
+                TexEquation('test_eq', 'a = b')
+        for name in ('paper', 'slides', 'poster'):
+            self.assertEqual((self.root / name / 'test_snip.tex').read_text(), 'value%')
+            self.assertTrue((self.root / name / 'eq' / 'test_eq.tex').exists())
+        self.assertFalse((self.root / 'test_snip.tex').exists())
+
+    def test_errors(self):
+        with config.override(auto_load=False):
+            snippet = TexSnippet('test_snip')
+        with self.assertRaises(Exception):
+            snippet.save_to(*self.targets)
+        errors = save_to([snippet, TexSnippet('test_other', 'value')], self.targets)
+        self.assertEqual(sorted(index for _, index in errors), [0, 1, 2])
+        self.assertTrue((self.root / 'poster' / 'test_other.tex').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,18 @@
+import io
 import os
 import tempfile
 import unittest
+from pathlib import Path
 
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import seaborn as sns
 import statsmodels.formula.api as smf
 from stargazer.stargazer import Stargazer
 
 from texpro import *
+from texpro import Image, render_cache
 
 
 class FigTestSuite(unittest.TestCase):
@@ -31,6 +36,42 @@ class FigTestSuite(unittest.TestCase):
         self.assertTrue(os.path.exists(os.path.join(self.doc_path.name, 'img', 'test_fig.pdf')))
         self.assertTrue(os.path.exists(os.path.join(self.doc_path.name, 'fig', 'test_fig.tex')))
 
+    def test_skip_unchanged_figure(self):
+        self.plot.label = 'test_plot'
+        self.plot.save()
+        self.assertFalse(self.plot.render_skipped)
+        mtime = os.stat(self.plot.path).st_mtime_ns
+
+        # unchanged -> not rendered again
+        self.plot.save()
+        self.assertTrue(self.plot.render_skipped)
+        self.assertEqual(os.stat(self.plot.path).st_mtime_ns, mtime)
+
+        # changed figure or format arguments -> rendered again
+        self.plot.plot.axes[0].plot([0, 1], [1, 0])
+        self.plot.save()
+        self.assertFalse(self.plot.render_skipped)
+        self.plot.savefig_args = {}
+        self.plot.save()
+        self.assertFalse(self.plot.render_skipped)
+
+    def test_rasterize(self):
+        rng = np.random.default_rng(0)
+        ax = self.plot.plot.axes[0]
+        scatter = ax.scatter(rng.normal(size=20_000), rng.normal(size=20_000))
+        ax.plot([0, 1], [1, 0])
+        vector = Plot(self.plot.plot, 'vector', format='svg').save()
+        with self.assertLogs('texpro.texassets') as logs:
+            raster = Plot(self.plot.plot, 'vector', format='svg', rasterize=10_000, rasterize_dpi=50).save()
+        self.assertIn('rasterized 1 artists with 20,000 points at 50 dpi', logs.output[0])
+        self.assertIn('smaller', logs.output[0])
+
+        # only the scatter plot is rasterized, and the figure is left as it was
+        self.assertLess(raster.path.stat().st_size, len(vector.render()) / 2)
+        self.assertIn('<image', raster.path.read_text())
+        self.assertIn('xtick', raster.path.read_text())
+        self.assertFalse(scatter.get_rasterized())
+
 
 class StargazerTestSuite(unittest.TestCase):
     def setUp(self) -> None:
@@ -58,4 +99,157 @@ class StargazerTestSuite(unittest.TestCase):
 
         # do not use template
         self.table.use_template = False
-        self.assertEqual(self.table.tex, stargazer_tex)
\ No newline at end of file
+        self.assertEqual(self.table.tex, stargazer_tex)
+
+class TableTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        # path setup
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+
+        self.data = pd.DataFrame({'x': np.arange(100), 'y': np.linspace(0, 1, 100), 'name': 'a_b'})
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def test_render_cache(self):
+        table = TexTable('test_tab', self.data)
+        hits = render_cache.hits
+        self.assertEqual(table.tex, table.tex)
+        self.assertEqual(render_cache.hits, hits + 2)
+
+        # changed data -> rendered again
+        self.data.iloc[0, 0] = 100
+        self.assertIn('100', table.tex)
+
+    def test_native_engine(self):
+        self.data.loc[3, 'y'] = np.nan
+        table = TexTable('test_tab', self.data, engine='native', tabular_args={'float_format': '%.2f'})
+        tex = table.path.read_text()
+        self.assertEqual(tex, table.tex)
+        self.assertIn(r'\begin{tabular}{lrrl}', tex)
+        self.assertIn(r'3 & 3 &  & a\_b \\', tex)
+        self.assertIn(r'\caption{}', tex)
+
+    def test_native_longtable_files(self):
+        TexTable('test_tab', self.data, engine='native',
+                 tabular_args={'longtable': True, 'rows_per_file': 40})
+        tab_path = os.path.join(self.doc_path.name, 'tab')
+        self.assertEqual(sorted(os.listdir(tab_path)),
+                         ['test_tab-1.tex', 'test_tab-2.tex', 'test_tab-3.tex', 'test_tab.tex'])
+        with open(os.path.join(tab_path, 'test_tab.tex')) as file:
+            self.assertEqual(file.read().split('\n')[0], r'\input{tab/test_tab-1}')
+        with open(os.path.join(tab_path, 'test_tab-1.tex')) as file:
+            self.assertIn(r'\label{tab:test_tab}', file.read())
+        with open(os.path.join(tab_path, 'test_tab-2.tex')) as file:
+            self.assertIn(r'\addtocounter{table}{-1}\caption[]{ (continued)}', file.read())
+
+        # fits into one file -> saved like without rows_per_file
+        table = TexTable('test_small', self.data, engine='native', tabular_args={'rows_per_file': 1000})
+        self.assertEqual(table.path.read_text(), table.tex)
+        self.assertIn(r'\label{tab:test_small}', table.tex)
+        self.assertFalse(os.path.exists(os.path.join(tab_path, 'test_small-1.tex')))
+
+    def test_html_preview(self):
+        data = pd.DataFrame(np.arange(30_000).reshape(1000, 30))
+        table = TexTable('test_tab', data)
+        with config.override(html_max_rows=10, html_max_columns=6):
+            html = table._repr_html_()
+            self.assertEqual(html.count('<tr>'), 10 + 1)  # and the ellipsis row
+            self.assertIn('<td>29999</td>', html)  # last row and column
+            self.assertNotIn('<td>15000</td>', html)
+            self.assertIn('1000 rows × 30 columns', html)
+            self.assertIsNone(table._repr_latex_())  # not stored next to the truncated html
+
+            # all that a notebook stores
+            from IPython.core.formatters import DisplayFormatter
+            output, _ = DisplayFormatter().format(table)
+            self.assertEqual(sorted(output), ['text/html', 'text/plain'])
+            self.assertLess(sum(len(value) for value in output.values()), 10_000)
+
+            # cached per fingerprint
+            hits = render_cache.hits
+            self.assertEqual(table._repr_html_(), html)
+            self.assertEqual(render_cache.hits, hits + 1)
+            data.iloc[-1, -1] = -1
+            self.assertIn('<td>-1</td>', table._repr_html_())
+
+        # within the memory budget, with fewer rows
+        with config.override(html_max_bytes=5000):
+            self.assertLessEqual(len(table._repr_html_().encode()), 5000)
+        small = TexTable('test_small', data.iloc[:5, :5])
+        self.assertIn('tab:test_small', small._repr_latex_())
+        with config.override(html_max_bytes=100):
+            self.assertIsNone(small._repr_latex_())
+        self.assertEqual(table.path.read_text().count(r'\\'), 1000 + 1)  # the tex file is complete
+
+        fits = [smf.ols(f'y ~ {" + ".join(["x"] * i)}', self.data).fit() for i in range(1, 6)]
+        stargazer = Stargazer(fits)
+        stargazer.custom_columns(['a', 'b'], [2, 3])
+        with config.override(html_max_columns=3):
+            html = StargazerTable('test_reg', stargazer)._repr_html_()
+        self.assertIn('(3)', html)
+        self.assertNotIn('(4)', html)
+        self.assertIn('3 of 5 models', html)
+        with config.override(html_max_columns=3):
+            self.assertIsNone(StargazerTable('test_reg', stargazer)._repr_latex_())
+
+
+# smallest valid png (1x1 pixel)
+PNG_DATA = bytes.fromhex('89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+                         '1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082')
+
+
+class ImageTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        # path setup
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+
+        self.source = os.path.join(self.doc_path.name, 'source.png')
+        with open(self.source, 'wb') as file:
+            file.write(PNG_DATA)
+
+    def tearDown(self) -> None:
+        config.hardlink_files = False
+        self.doc_path.cleanup()
+
+    def test_file_image(self):
+        image = Image('test_img', file=self.source)
+        image.save()
+        self.assertIsNone(image._data)  # saved without reading the file
+        self.assertEqual(image.path.read_bytes(), PNG_DATA)
+        self.assertTrue(image.is_current())
+
+        # only read when displayed
+        self.assertEqual(image._repr_png_(), Image('test_img', data=PNG_DATA)._repr_png_())
+
+        # loading from label and format
+        self.assertEqual(bytes(Image('test_img', format='png').data), PNG_DATA)
+
+    def test_hardlink(self):
+        config.hardlink_files = True
+        image = Image('test_img', file=self.source).save()
+        self.assertTrue(os.path.samefile(image.path, self.source))
+
+    def test_preview(self):
+        import PIL.Image
+        from texpro.preview import make_preview
+
+        large = os.path.join(self.doc_path.name, 'large.png')
+        PIL.Image.new('RGB', (2000, 1000), color='red').save(large)
+        preview = make_preview(Path(large))
+        self.assertEqual(PIL.Image.open(io.BytesIO(preview)).size, (config.preview_max_width, 400))
+
+        # cached on disk
+        previews = os.listdir(os.path.join(self.doc_path.name, '.texpro-previews'))
+        self.assertEqual(len(previews), 1)
+        self.assertEqual(make_preview(Path(large)), preview)
+
+        # a changed file gets a new preview
+        PIL.Image.new('RGB', (1000, 1000), color='red').save(large)
+        preview = make_preview(Path(large))
+        self.assertEqual(PIL.Image.open(io.BytesIO(preview)).size, (config.preview_max_width,) * 2)
+
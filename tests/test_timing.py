@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+import texpro
+from texpro import *
+from texpro import render_cache, stats
+from texpro.timing import add_hook, remove_hook, reset_stats
+
+
+class TimingTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.doc_path = tempfile.TemporaryDirectory()
+        config.doc_path = self.doc_path.name
+        config.make_folders()
+        render_cache.clear()
+        reset_stats()
+
+    def tearDown(self) -> None:
+        self.doc_path.cleanup()
+
+    def test_stats(self):
+        df = pd.DataFrame({'a': [1, 2], 'b': [.5, .25]})
+        TexTable('test_tab', df)
+        TexTable('test_tab', df)
+        TexEquation('test_eq', 'a_b')
+
+        rows = {row['label']: row for row in texpro.stats()}
+        table = rows['test_tab']
+        self.assertEqual(table['type'], 'TexTable')
+        self.assertEqual(table['init_calls'], 2)
+        self.assertEqual(table['render_calls'], 2)
+        self.assertEqual((table['cache_hits'], table['cache_misses']), (1, 1))
+        self.assertGreater(table['bytes_written'], 0)
+        self.assertEqual(table['bytes_skipped'], table['bytes_written'])
+        self.assertGreaterEqual(table['init_seconds'], table['render_seconds'] + table['write_seconds'])
+
+        by_type = {row['type']: row for row in texpro.stats(by='type')}
+        self.assertEqual(by_type['TexEquation']['assets'], 1)
+        self.assertEqual(len(pd.DataFrame(texpro.stats())), 2)
+
+    def test_hook(self):
+        events = []
+        add_hook(events.append)
+        try:
+            TexEquation('test_eq', 'a_b')
+        finally:
+            remove_hook(events.append)
+        self.assertEqual([event['phase'] for event in events], ['render', 'write', 'init'])
+        self.assertEqual(events[1]['label'], 'test_eq')
+        self.assertIn('bytes_written', events[1])
+
+    def test_profile_variable(self):
+        profile = os.path.join(self.doc_path.name, 'profile.json')
+        code = f'import texpro; texpro.config.doc_path = {self.doc_path.name!r}; texpro.TexEquation("eq", "a")'
+        env = dict(os.environ, TEXPRO_PROFILE=profile)
+        subprocess.run([sys.executable, '-c', code], env=env, check=True)
+        with open(profile) as file:
+            self.assertEqual([row['label'] for row in json.load(file)], ['eq'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,5 +2,35 @@
 
 __version__ = '0.9.2'
 
+# only the settings and the asset classes, so that `from texpro import *` neither shadows generic names (e.g.
+# stats or build) nor imports heavy modules: Image (IPython), SnippetBank (pandas) and the utilities are imported
+# by name, e.g. `from texpro import Image, batch`
+__all__ = ['config', 'TexSnippet', 'TexEquation', 'TexTable', 'StargazerTable', 'TexFigure', 'Plot']
+
 from .settings import config
 from .texassets import *
+from .manifest import write_stats
+from .cache import load_cache, preload, render_cache
+from .background import flush, wait
+from .batch import batch
+from .build import build
+from .registry import registry
+from .timing import stats
+from .targets import save_to
+
+# imported on first use, to keep `import texpro` fast (Image requires IPython, export_plots multiprocessing,
+# SnippetBank pandas)
+_lazy = {
+    'Image': 'image',
+    'export_plots': 'export',
+    'SnippetBank': 'snippets',
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        from importlib import import_module
+        value = getattr(import_module(f'.{_lazy[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,77 @@
+"""Command line interface, e.g. `python -m texpro run analysis/*.ipynb --workers 8`"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+
+def run(args):
+    from .runner import as_dicts, run_notebooks, summary
+
+    results = run_notebooks(args.notebooks, kernel=args.kernel, workers=args.workers, data=args.data,
+                            force=args.force, allow_errors=args.allow_errors, state_file=args.state_file)
+    print(json.dumps(as_dicts(results), indent=1) if args.json else summary(results))
+    return int(any(result.error for result in results.values()))
+
+
+def build(args):
+    from .build import build as build_documents
+
+    documents = [Path(document).absolute() for document in args.documents]
+    build_documents(*documents, workers=args.workers, engine=args.engine, force=args.force)
+    return 0
+
+
+def watch(args):
+    from .settings import config
+    from .watch import watch as watch_documents
+
+    documents = [Path(document).absolute() for document in args.documents]
+    config.doc_path = Path(args.doc_path).absolute() if args.doc_path else documents[0].parent
+    watch_documents(*documents, folders=args.folders, interval=args.interval, debounce=args.debounce,
+                    engine=args.engine)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m texpro')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='execute notebooks in parallel, skipping unchanged ones')
+    run_parser.add_argument('notebooks', nargs='+')
+    run_parser.add_argument('--kernel', default='', help="kernel name (default: the notebook's kernel)")
+    run_parser.add_argument('--workers', type=int, default=None, help='number of kernels running in parallel')
+    run_parser.add_argument('--data', nargs='*', default=[], help='data files the notebooks depend on')
+    run_parser.add_argument('--force', action='store_true', help='also run unchanged notebooks')
+    run_parser.add_argument('--allow-errors', action='store_true')
+    run_parser.add_argument('--state-file', default='.texpro-runs.json')
+    run_parser.add_argument('--json', action='store_true', help='print results as JSON')
+    run_parser.set_defaults(func=run)
+
+    build_parser = subparsers.add_parser('build', help='compile LaTeX documents whose dependencies changed')
+    build_parser.add_argument('documents', nargs='+')
+    build_parser.add_argument('--engine', default='xelatex')
+    build_parser.add_argument('--workers', type=int, default=None)
+    build_parser.add_argument('--force', action='store_true', help='also build unchanged documents')
+    build_parser.set_defaults(func=build)
+
+    watch_parser = subparsers.add_parser('watch', help='rebuild LaTeX documents whenever their assets change')
+    watch_parser.add_argument('documents', nargs='+')
+    watch_parser.add_argument('--doc-path', default=None, help="default: the first document's folder")
+    watch_parser.add_argument('--folders', nargs='*', default=None,
+                              help='folders to watch (default: the asset folders of config)')
+    watch_parser.add_argument('--engine', default='xelatex')
+    watch_parser.add_argument('--interval', type=float, default=.1, help='seconds between checks')
+    watch_parser.add_argument('--debounce', type=float, default=.2,
+                              help='seconds without changes before rebuilding')
+    watch_parser.set_defaults(func=watch)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
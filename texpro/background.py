@@ -0,0 +1,90 @@
+"""Background saving of assets (config.async_save), so that notebook cells do not block on disk I/O"""
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from .settings import config
+
+
+class SaveError(Exception):
+    """Raised by flush() if more than one background save failed"""
+
+    def __init__(self, errors: List[Tuple[object, BaseException]]):
+        self.errors = errors
+        details = '\n'.join(f'{asset.label}: {error!r}' for asset, error in errors)
+        super().__init__(f'{len(errors)} assets could not be saved:\n{details}')
+
+
+class SaveQueue:
+    """Saves assets in a thread pool.  Saves to the same path run in order, one at a time, and saves
+    that have not started yet are replaced by later saves to the same path."""
+
+    def __init__(self):
+        self._executor = None
+        self._cond = threading.Condition()
+        # newest asset per path, not yet being saved, with the context (config overrides) it was submitted in
+        self._latest: Dict[Path, Tuple[object, contextvars.Context]] = {}
+        self._busy: Set[Path] = set()  # paths with a scheduled or running save
+        self._errors: List[Tuple[object, BaseException]] = []
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=config.save_workers,
+                                                thread_name_prefix='texpro-save')
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        """Number of paths that are still being saved"""
+        with self._cond:
+            return len(self._busy)
+
+    def submit(self, asset):
+        """Queues saving the asset (to config.targets, if set), blocking only while config.save_queue_size paths are already pending"""
+        path = asset.path
+        with self._cond:
+            self._cond.wait_for(lambda: path in self._busy or len(self._busy) < max(config.save_queue_size, 1))
+            self._latest[path] = (asset, contextvars.copy_context())  # coalesce with a save that has not started yet
+            if path in self._busy:
+                return
+            self._busy.add(path)
+        self.executor.submit(self._run, path)
+
+    def _run(self, path: Path):
+        while True:
+            with self._cond:
+                asset, context = self._latest.pop(path, (None, None))
+                if asset is None:
+                    self._busy.discard(path)
+                    self._cond.notify_all()
+                    return
+            try:
+                context.run(asset._auto_save)
+            except BaseException as e:
+                with self._cond:
+                    self._errors.append((asset, e))
+
+    def flush(self):
+        """Waits for all queued saves to finish, then re-raises any errors that occurred while saving"""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._busy)
+            errors, self._errors = self._errors, []
+        if len(errors) == 1:
+            raise errors[0][1]
+        elif errors:
+            raise SaveError(errors) from errors[0][1]
+
+
+save_queue = SaveQueue()
+
+
+def flush():
+    """Waits until all background saves (config.async_save) are written, re-raising any errors"""
+    save_queue.flush()
+
+
+wait = flush
@@ -0,0 +1,102 @@
+"""Deferring auto saves until the end of a `with texpro.batch():` block"""
+
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .background import SaveError
+from .settings import _overrides, config
+
+
+class Batch:
+    """Collects assets by path; only the last asset per path is kept, and saved with the config overrides that
+    were active when it was created"""
+
+    def __init__(self):
+        self.assets: Dict[Path, object] = {}
+        self.contexts: Dict[Path, Context] = {}
+
+    def add(self, asset):
+        path = asset.path.resolve()
+        self.assets.pop(path, None)  # re-insert, so assets are saved in the order they were last created
+        self.assets[path] = asset
+        self.contexts[path] = copy_context()
+
+    def __len__(self):
+        return len(self.assets)
+
+    def save(self, workers: int = None):
+        """Creates all needed folders, then saves every asset once (to each of config.targets, if set)"""
+        groups: Dict[int, Tuple[Context, List]] = {}
+        for path, asset in self.assets.items():
+            context = self.contexts[path]
+            # assets created with the same overrides are saved together
+            groups.setdefault(id(context.get(_overrides)), (context, []))[1].append(asset)
+        errors = []
+        for context, assets in groups.values():
+            errors.extend(context.run(self._save, assets, workers))
+        self._raise(errors)
+
+    @staticmethod
+    def _save(assets: List, workers: Optional[int]) -> List[Tuple[object, BaseException]]:
+        if config.targets:
+            from .targets import save_to
+            return [(asset, e) for (asset, _), e in save_to(assets, config.targets).items()]
+
+        for folder in {asset.path.parent for asset in assets}:
+            folder.mkdir(parents=True, exist_ok=True)
+
+        errors = []
+        if workers is not None:
+            from .export import export_plots
+            from .texassets import Plot, TexFigure
+            plots = [asset for asset in assets
+                     if isinstance(asset, Plot) or isinstance(asset, TexFigure) and isinstance(asset.figure, Plot)]
+            errors.extend(export_plots(plots, workers=workers).items())
+            assets = [asset for asset in assets if asset not in plots]
+        for asset in assets:
+            try:
+                asset.save()
+            except Exception as e:
+                errors.append((asset, e))
+        return errors
+
+    @staticmethod
+    def _raise(errors):
+        if len(errors) == 1:
+            raise errors[0][1]
+        elif errors:
+            raise SaveError(errors) from errors[0][1]
+
+
+# per thread and asyncio task, like config overrides
+_active: ContextVar[Optional[Batch]] = ContextVar('texpro_batch', default=None)
+
+
+def active_batch() -> Optional[Batch]:
+    """The batch collecting auto saves, if inside a `with texpro.batch():` block"""
+    return _active.get()
+
+
+@contextmanager
+def batch(workers: int = None):
+    """Defers the auto saves of all assets created inside the block and writes them in one pass at the end.
+
+    If an asset with the same path is created several times, only the last one is saved.  If `workers` is
+    given, plots are rendered in that many processes (see export_plots).  Nested blocks join the outer one.
+    Only assets created in the same thread (or asyncio task) are collected, and each is saved with the config
+    overrides it was created with.  If the block raises an exception, nothing is saved.
+    """
+    current = _active.get()
+    if current is not None:
+        yield current
+        return
+
+    current = Batch()
+    token = _active.set(current)
+    try:
+        yield current
+    finally:
+        _active.reset(token)
+    current.save(workers=workers)
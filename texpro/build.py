@@ -0,0 +1,158 @@
+"""Incremental LaTeX builds: compile documents only if they or the files they include have changed"""
+
+import hashlib
+import json
+import logging
+import re
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Union
+
+from .settings import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENGINE_ARGS = ('-synctex=1', '-interaction=nonstopmode')
+GRAPHICS_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg', '.eps')
+
+_comment_re = re.compile(r'(?<!\\)%.*')
+_input_re = re.compile(r'\\(input|include|includegraphics)\s*(?:\[[^\]]*\])?\s*{([^}]+)}')
+
+
+@dataclass
+class BuildResult:
+    document: Path
+    pdf: Path
+    compiled: bool  # False if the document was up to date
+    runs: int = 0
+    seconds: float = 0.
+
+
+def _candidates(name: str, folder: Path, extensions) -> List[Path]:
+    """The paths that LaTeX looks for, in order"""
+    path = folder / name.strip()
+    candidates = [path] if path.suffix else []
+    return candidates + [path.with_name(path.name + ext) for ext in extensions]
+
+
+def _resolve(name: str, folder: Path, extensions) -> Optional[Path]:
+    for candidate in _candidates(name, folder, extensions):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def dependencies(document: Path, missing: bool = False) -> Set[Path]:
+    """All files included by a .tex document via \\input, \\include and \\includegraphics (recursively).
+    Paths are resolved relative to the document's folder, as LaTeX does.  With `missing`, included files that
+    do not exist yet are given by all paths they may be created at (e.g. for watching them)."""
+    folder = document.parent
+    found = set()
+    to_scan = [document]
+    while to_scan:
+        tex = _comment_re.sub('', to_scan.pop().read_text(errors='replace'))
+        for command, name in _input_re.findall(tex):
+            is_graphics = command == 'includegraphics'
+            extensions = GRAPHICS_EXTENSIONS if is_graphics else ('.tex',)
+            path = _resolve(name, folder, extensions)
+            if path is None:
+                if missing:
+                    found.update(_candidates(name, folder, extensions))
+                continue
+            if path in found:
+                continue
+            found.add(path)
+            if not is_graphics:
+                to_scan.append(path)
+    return found
+
+
+def _file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _key(path: Path, folder: Path) -> str:
+    try:
+        return path.relative_to(folder).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def _fingerprint(document: Path, command: List[str]) -> dict:
+    files = [document] + sorted(dependencies(document))
+    return {'command': command,
+            'files': {_key(path, document.parent): _file_hash(path) for path in files}}
+
+
+def _aux_hash(aux: Path) -> Optional[str]:
+    return _file_hash(aux) if aux.is_file() else None
+
+
+def build_document(document: Union[str, Path], engine: str = 'xelatex', engine_args=DEFAULT_ENGINE_ARGS,
+                   build_folder: str = '.tex-build', force: bool = False, max_runs: int = 5) -> BuildResult:
+    """Compiles a .tex document, unless neither it nor its dependencies changed since the last build.
+
+    The engine is re-run until the .aux file no longer changes (at most max_runs times).  The pdf is copied
+    from the build folder next to the document.
+    """
+    document = Path(document)
+    if not document.suffix:
+        document = document.with_suffix('.tex')
+    document = document.absolute()
+    folder = document.parent
+    (folder / build_folder).mkdir(exist_ok=True)
+    pdf = document.with_suffix('.pdf')
+    aux = folder / build_folder / document.with_suffix('.aux').name
+    state_file = folder / build_folder / document.with_suffix('.texpro-build.json').name
+
+    command = [engine, *engine_args, f'-output-directory={build_folder}', document.name]
+    fingerprint = _fingerprint(document, command)
+    if not force and pdf.is_file() and state_file.is_file():
+        try:
+            if json.loads(state_file.read_text()) == fingerprint:
+                return BuildResult(document, pdf, compiled=False)
+        except ValueError:
+            pass
+
+    start = time.perf_counter()
+    runs = 0
+    aux_hash = _aux_hash(aux)
+    while runs < max_runs:
+        result = subprocess.run(command, cwd=folder, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        runs += 1
+        if result.returncode != 0:
+            raise Exception('Error compiling document.\n'
+                            f'Command: {result.args}\n{result.stdout}')
+        new_aux_hash = _aux_hash(aux)
+        if new_aux_hash == aux_hash:
+            break  # references are stable
+        aux_hash = new_aux_hash
+
+    shutil.copyfile(folder / build_folder / pdf.name, pdf)
+    state_file.write_text(json.dumps(fingerprint, indent=1))
+    return BuildResult(document, pdf, compiled=True, runs=runs, seconds=time.perf_counter() - start)
+
+
+def build(*documents: Union[str, Path], workers: int = None, **kwargs) -> Dict[Path, BuildResult]:
+    """Builds one or more documents (see build_document), in parallel processes if there are several.
+
+    Relative document paths are relative to config.doc_path.  Keyword arguments are passed on to
+    build_document.
+    """
+    documents = [config.abspath(Path(document)) for document in documents]
+    if len(documents) == 1 or workers == 1:
+        results = [build_document(document, **kwargs) for document in documents]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(build_document, document, **kwargs) for document in documents]
+            results = [future.result() for future in futures]
+    for result in results:
+        if result.compiled:
+            logger.info(f'Built {result.document.name} in {result.seconds:.1f}s ({result.runs} runs)')
+        else:
+            logger.info(f'{result.document.name} is up to date')
+    return {result.document: result for result in results}
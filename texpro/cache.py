@@ -0,0 +1,176 @@
+"""Memoization of expensive renders (e.g. DataFrame.to_latex), keyed on fingerprints of their inputs, and of
+files read by load() (e.g. with config.auto_load), validated by their modification time and size"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from .settings import config
+from .timing import note
+
+
+def df_fingerprint(df) -> Optional[str]:
+    """Hash of a DataFrame's values, index, columns and dtypes (None if it cannot be hashed)"""
+    try:
+        from pandas.util import hash_pandas_object
+        values = hash_pandas_object(df, index=True).values
+    except (ImportError, TypeError, ValueError):
+        return None
+    h = hashlib.sha256(values.tobytes())
+    h.update(repr((list(df.columns), [str(t) for t in df.dtypes], list(df.index.names))).encode())
+    return h.hexdigest()
+
+
+def obj_fingerprint(obj) -> str:
+    """Hash of an object's identity and attributes, to detect changes in its (render) settings"""
+    attrs = sorted(vars(obj).items(), key=lambda item: item[0])
+    return hashlib.sha256(repr((id(obj), attrs)).encode()).hexdigest()
+
+
+class RenderCache:
+    """A bounded LRU cache of rendered strings.  Keys include the settings a render depends on (e.g.
+    config.tab_template), so that documents with different templates can share the cache."""
+
+    def __init__(self):
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def info(self) -> dict:
+        return dict(hits=self.hits, misses=self.misses, size=len(self), maxsize=config.render_cache_size)
+
+    def get(self, key, render: Callable[[], str]) -> str:
+        """Returns the cached result for `key`, calling `render()` if there is none (or key is None)"""
+        with self._lock:
+            if key is not None and key in self._cache:
+                self.hits += 1
+                note(cache='hit')
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+        note(cache='miss')
+        result = render()
+        if key is None or config.render_cache_size <= 0:
+            return result
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > config.render_cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+render_cache = RenderCache()
+
+
+class LoadCache:
+    """A bounded LRU cache of file contents (at most config.load_cache_size bytes), keyed by resolved path and
+    validated by the files' (st_mtime_ns, st_size), so that changed files are read again"""
+
+    def __init__(self):
+        self._cache = OrderedDict()  # path -> (mtime_ns, size, data)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.bytes = 0
+
+    def info(self) -> dict:
+        return dict(hits=self.hits, misses=self.misses, size=len(self), bytes=self.bytes,
+                    maxbytes=config.load_cache_size)
+
+    @staticmethod
+    def _cacheable(size: int) -> bool:
+        # a single file may take up at most a quarter of the cache, so that it does not flush everything else
+        return 0 < size <= config.load_cache_size // 4
+
+    def _get(self, key: str, stat: os.stat_result) -> Optional[bytes]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+                return None
+            self._cache.move_to_end(key)
+            return entry[2]
+
+    def _add(self, key: str, stat: os.stat_result, data: bytes):
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[2])
+            self._cache[key] = (stat.st_mtime_ns, stat.st_size, data)
+            self.bytes += len(data)
+            while self.bytes > config.load_cache_size:
+                self.bytes -= len(self._cache.popitem(last=False)[1][2])
+
+    def read(self, path: Union[str, Path], read: Callable[[Path], bytes] = None) -> bytes:
+        """The content of a file, from the cache if it is unchanged.  Files that are too large to be cached
+        are read with read(path) (default: Path.read_bytes)."""
+        path = Path(path)
+        key = os.path.realpath(path)
+        stat = os.stat(key)  # before reading, so that a file changed meanwhile is read again next time
+        data = self._get(key, stat)
+        if data is not None:
+            self.hits += 1
+            note(cache='hit')
+            return data
+        self.misses += 1
+        note(cache='miss')
+        if not self._cacheable(stat.st_size):
+            return (read or Path.read_bytes)(path)
+        data = path.read_bytes()
+        self._add(key, stat, data)
+        return data
+
+    def read_text(self, path: Union[str, Path]) -> str:
+        """Like Path.read_text, decoding the (cached) content as utf-8, in which texpro saves tex files"""
+        text = self.read(path).decode()
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')  # universal newlines, as in open()
+        return text
+
+    def preload(self, folder: Union[str, Path], pattern: str = '*') -> int:
+        """Reads the files in a folder (not its subfolders) whose names match pattern into the cache, with a
+        single scan of the folder, until the cache is full.  Returns the number of files read."""
+        read = 0
+        with os.scandir(os.path.realpath(folder)) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not fnmatch(entry.name, pattern) or not entry.is_file():
+                    continue  # e.g. files that are just being written
+                stat = entry.stat()
+                if not self._cacheable(stat.st_size) or self._get(entry.path, stat) is not None:
+                    continue
+                if self.bytes + stat.st_size > config.load_cache_size:
+                    break  # do not evict what was just read
+                with open(entry.path, 'rb') as file:
+                    self._add(entry.path, stat, file.read())
+                read += 1
+        return read
+
+
+load_cache = LoadCache()
+
+
+def preload(folder: Union[str, Path] = 'config.img_path', pattern: str = '*') -> int:
+    """Reads the files in an asset folder (absolute or relative to doc_path) into the load cache, so that
+    loading assets from them (e.g. `Image(label, format='png')` or `TexSnippet(label)`) does not read them
+    again.  Returns the number of files read."""
+    folder = config.get_or_return(folder)
+    return load_cache.preload(config.abspath(Path(folder)), pattern)
@@ -0,0 +1,101 @@
+"""Exporting many assets at once"""
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable
+
+from .texassets import Plot, TexAsset, TexFigure, render_plot
+
+
+def _init_worker():
+    try:
+        import matplotlib
+        matplotlib.use('Agg', force=True)  # workers are headless
+    except ImportError:
+        pass
+
+
+def _render_pickled(payload: bytes) -> bytes:
+    return render_plot(*pickle.loads(payload))
+
+
+def export_plots(plots: Iterable, workers: int = None) -> Dict[Plot, BaseException]:
+    """Saves many plots, rendering them in parallel processes (defaults to one per CPU).
+
+    Accepts Plots and TexFigures of Plots.  Plots that cannot be pickled are rendered in this process.
+    The files are written to the usual asset paths.  Returns the plots that could not be saved,
+    mapped to their errors.
+    """
+    plots = list(plots)
+    figures = [plot for plot in plots if isinstance(plot, TexFigure)]
+    for figure in figures:
+        # use label from figure also for image, if none set yet
+        if getattr(figure.figure, 'label', None) is None:
+            figure.figure.label = figure.label
+    plots = [plot.figure if isinstance(plot, TexFigure) else plot for plot in plots]
+
+    errors = {}
+    done = set()
+    local, remote = [], {}
+    fingerprints = {}
+    for plot in plots:
+        if not isinstance(plot, Plot):
+            local.append(plot)
+            continue
+        try:
+            fingerprints[plot] = plot._check_current()
+        except Exception as e:
+            errors[plot] = e
+            continue
+        if plot.render_skipped:
+            continue
+        try:
+            payload = pickle.dumps(plot.render_args)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            local.append(plot)
+        else:
+            remote[plot] = payload
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(remote) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(remote)), initializer=_init_worker) as pool:
+                futures = {plot: pool.submit(_render_pickled, payload) for plot, payload in remote.items()}
+                for plot, future in futures.items():
+                    try:
+                        data = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        errors[plot] = e
+                        continue
+                    if data is None:
+                        local.append(plot)
+                        continue
+                    try:
+                        plot._save_rendered(data, fingerprints[plot])
+                        done.add(plot)
+                    except Exception as e:
+                        errors[plot] = e
+        except BrokenProcessPool:
+            # e.g. a worker crashed: render everything that is still missing here
+            local.extend(plot for plot in remote if plot not in errors and plot not in done and plot not in local)
+    else:
+        local.extend(remote)
+
+    for plot in local:
+        try:
+            plot.save()
+        except Exception as e:
+            errors[plot] = e
+
+    # save the tex files of figures whose image was exported
+    for figure in figures:
+        if figure.figure not in errors:
+            try:
+                TexAsset.save(figure)
+            except Exception as e:
+                errors[figure] = e
+    return errors
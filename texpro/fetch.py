@@ -0,0 +1,198 @@
+"""Downloading images (Image(url=...)) concurrently into a local cache, revalidated with ETag/Last-Modified"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+from urllib.parse import urlparse
+from warnings import warn
+
+from .settings import config
+
+_lock = threading.Lock()
+_url_locks: Dict[str, threading.Lock] = {}
+_validated = set()  # urls that were downloaded or revalidated by this process
+_pinned: Dict[str, int] = {}  # urls whose files are in use (e.g. by Images), by number of users
+
+
+def _cache_folder() -> Path:
+    return config.abspath(config.url_cache_path)
+
+
+def _entry(url: str) -> Path:
+    """The metadata file of a cached url; the content is in the file it names"""
+    return _cache_folder() / (hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+
+def _extension(url: str, content_type: Optional[str]) -> str:
+    suffix = Path(urlparse(url).path).suffix.lower()
+    if not suffix and content_type:
+        suffix = mimetypes.guess_extension(content_type.split(';')[0].strip()) or ''
+    return suffix
+
+
+def _read_entry(url: str) -> Optional[dict]:
+    try:
+        meta = json.loads(_entry(url).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if (_cache_folder() / meta['file']).is_file() else None
+
+
+def _write_entry(url: str, meta: dict, body: bytes = None):
+    folder = _cache_folder()
+    folder.mkdir(parents=True, exist_ok=True)
+    if body is not None:
+        tmp_file = folder / f'.{meta["file"]}.{os.getpid()}-{threading.get_ident()}.tmp'
+        tmp_file.write_bytes(body)
+        os.replace(tmp_file, folder / meta['file'])
+    entry = _entry(url)
+    tmp_file = entry.with_name(f'.{entry.name}.{os.getpid()}-{threading.get_ident()}.tmp')
+    tmp_file.write_text(json.dumps(meta))
+    os.replace(tmp_file, entry)  # its mtime marks the last use, for LRU eviction
+
+
+def _touch(url: str):
+    try:
+        os.utime(_entry(url))
+    except FileNotFoundError:
+        pass
+
+
+def _download(url: str, cached: Optional[dict]) -> Optional[dict]:
+    """Downloads url into the cache, unless the server confirms that the cached version is current"""
+    request = urllib.request.Request(url, headers={'User-Agent': 'texpro'})
+    if cached is not None:
+        if cached.get('etag'):
+            request.add_header('If-None-Match', cached['etag'])
+        if cached.get('last_modified'):
+            request.add_header('If-Modified-Since', cached['last_modified'])
+    try:
+        with urllib.request.urlopen(request, timeout=config.fetch_timeout) as response:
+            body = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached is not None:
+            _touch(url)
+            return cached
+        raise
+    meta = dict(url=url, file=_entry(url).stem + '-content' + _extension(url, headers.get('Content-Type')),
+                etag=headers.get('ETag'), last_modified=headers.get('Last-Modified'),
+                content_type=headers.get('Content-Type'), size=len(body))
+    _write_entry(url, meta, body)
+    return meta
+
+
+def fetch(url: str, revalidate: bool = True) -> Path:
+    """The cached file of a url, downloaded if it is not cached yet.
+
+    A cached url is revalidated with the server (once per process) unless revalidate is False; if the server
+    cannot be reached, the cached version is used.
+    """
+    path = _fetch(url, revalidate)
+    evict(keep=[url])
+    return path
+
+
+def _fetch(url: str, revalidate: bool) -> Path:
+    """fetch, without evicting from the cache"""
+    with _lock:
+        url_lock = _url_locks.setdefault(url, threading.Lock())
+    with url_lock:  # one download per url at a time
+        cached = _read_entry(url)
+        if cached is not None and (not revalidate or url in _validated):
+            _touch(url)
+            meta = cached
+        else:
+            try:
+                meta = _download(url, cached)
+            except (urllib.error.URLError, OSError) as e:
+                if cached is None:
+                    raise
+                warn(f'Could not revalidate {url}, using the cached version: {e}')
+                meta = cached
+            _validated.add(url)
+    return _cache_folder() / meta['file']
+
+
+def pin(url: str):
+    """Keeps the cached file of url from being evicted, until unpin(url) is called as often"""
+    with _lock:
+        _pinned[url] = _pinned.get(url, 0) + 1
+
+
+def unpin(url: str):
+    with _lock:
+        if _pinned.get(url, 0) > 1:
+            _pinned[url] -= 1
+        else:
+            _pinned.pop(url, None)
+
+
+def fetch_many(urls: Iterable[str], workers: int = None,
+               revalidate: bool = True) -> Dict[str, Union[Path, BaseException]]:
+    """Fetches urls concurrently (see fetch); returns the cached file, or the error, of each url.  The cache is
+    evicted once afterwards, keeping the returned files."""
+    urls = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(max_workers=workers or config.fetch_workers,
+                            thread_name_prefix='texpro-fetch') as pool:
+        futures = {url: pool.submit(_fetch, url, revalidate) for url in urls}
+    results = {url: future.exception() or future.result() for url, future in futures.items()}
+    evict(keep=[url for url, result in results.items() if isinstance(result, Path)])
+    return results
+
+
+def prefetch(urls: Iterable[str], workers: int = None) -> Dict[str, Union[Path, BaseException]]:
+    """Downloads (or revalidates) the images of many urls concurrently, so that Image(url=...) uses the
+    cache without further requests.  Errors are warned about, and raised later by Image."""
+    results = fetch_many(urls, workers)
+    for url, result in results.items():
+        if isinstance(result, BaseException):
+            warn(f'Could not download {url}: {result}')
+    return results
+
+
+def evict(max_bytes: int = None, keep: Iterable[str] = ()):
+    """Removes the least recently used urls (except those in `keep` and pinned ones) from the cache until it is at
+    most max_bytes large (default: config.url_cache_size)"""
+    max_bytes = config.url_cache_size if max_bytes is None else max_bytes
+    keep = set(keep)
+    folder = _cache_folder()
+    if not folder.is_dir():
+        return
+    with _lock:  # one eviction at a time, so that none removes what another keeps
+        keep |= _pinned.keys()
+        entries = []
+        total = 0
+        for entry in os.scandir(folder):
+            if entry.name.endswith('.json') and not entry.name.startswith('.'):
+                try:
+                    meta = json.loads(Path(entry.path).read_text())
+                    last_used = entry.stat().st_mtime_ns
+                except (FileNotFoundError, ValueError):
+                    continue
+                entries.append((last_used, Path(entry.path), meta))
+                total += meta.get('size', 0)
+        for _, entry, meta in sorted(entries, key=lambda item: item[0]):
+            if total <= max_bytes:
+                break
+            if meta['url'] in keep:
+                continue
+            for path in (entry, folder / meta['file']):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= meta.get('size', 0)
+            _validated.discard(meta['url'])
+
+
+def clear():
+    """Empties the cache"""
+    evict(0)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+__all__ = ['Image']
+
+import io
+import mmap
+import os
+import weakref
+from pathlib import Path
+from typing import Union
+
+import IPython
+
+from .cache import load_cache
+from .manifest import copy_if_changed, get_manifest
+from .objects import copy_object_if_changed
+from .registry import registry
+from .settings import config
+from .texassets import Asset
+from .timing import timed, timed_method
+
+
+def read_mapped(path: Path):
+    """The content of a file, memory-mapped (read-only) instead of read into memory"""
+    with open(path, 'rb') as file:
+        if path.stat().st_size == 0:
+            return b''
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Image(Asset, IPython.display.Image):
+    orig_format: str = None
+    _file: Path = None  # file holding the data, which is only read when needed
+    _data = None
+    stores_objects = True
+
+    def __init__(self, label: str = None, folder: Union[str, Path] = 'config.img_path',
+                 url: str = None, data: object = None, pil: object = None, format: str = 'png',
+                 file: Union[str, Path] = None, **kwargs):
+        """Currently supports png, jpg and gif.  There are five ways to create an Image.
+
+        To load an image from the web, specify the url.  The format is automatically inferred.  For example,
+            >>> Image('test', url='http://test.org/monkey.png', folder=Path('./img'))
+        will download http://test.org/monkey.png and save it to img/test.png.  Downloads are cached (in
+        config.url_cache_path) and revalidated once per session, see texpro.fetch.
+
+        To load an image from a byte variable, use data.  The format is automatically inferred.  For example,
+            >>> Image('test', data=img_data, folder=Path('./img'))
+        will save img_data to img/test.png.
+
+        To load a pillow/PIL image, specify pil and format.  For example,
+            >>> pil_img = PIL.Image.new('RGB', (10, 10), color = 'red')
+            >>> Image('test', pil=pil_img, format='png', folder=Path('./img'))
+        will save pil_img to img/test.png.
+
+        To load an image from a file, specify the label and format.  For example,
+            >>> Image('test', format='png', folder=Path('./img'))
+        will load the file img/test.png.
+
+        To copy an image from another file, specify file.  The format is inferred from its extension.  For example,
+            >>> Image('test', file='/data/scan.tif', folder=Path('./img'))
+        will save /data/scan.tif to img/test.tif.
+
+        Images from files are only read (memory-mapped) when displayed, and saved without reading them.
+        """
+        # initialise label and folder (registered once the format, and so the path, is known)
+        Asset.__init__(self, label, folder, register=False)
+
+        # initialise image
+        if url:
+            # downloaded into a cache (see texpro.fetch.prefetch to download many images concurrently)
+            from .fetch import fetch, pin, unpin
+            pin(url)  # the file is read lazily, so it must stay in the cache while this image exists
+            weakref.finalize(self, unpin, url)
+            self._file = fetch(url)
+            self.orig_format = self._file.suffix[1:].lower() or format
+            self._init_from_file(**kwargs)
+        elif data or pil:
+            if pil:
+                # convert PIL/pillow image into compressed image data (without copying the buffer)
+                data_io = io.BytesIO()
+                pil.save(data_io, format=format)
+                data = data_io.getbuffer()
+                kwargs.setdefault('format', format)
+            IPython.display.Image.__init__(self, data=data, **kwargs)
+        elif file:
+            self._file = Path(file)
+            self.orig_format = self._file.suffix[1:].lower()
+            self._init_from_file(**kwargs)
+        elif label and format:
+            # save format -> always used for self.file_name instead of inferred format
+            self.orig_format = format
+            self._file = self.path
+            self._init_from_file(**kwargs)
+        else:
+            raise SyntaxError('No image provided. Expecting url, data, pil or label and format.')
+        registry.register(self)
+
+    def _init_from_file(self, **kwargs):
+        # formats that cannot be embedded in a notebook (e.g. tif) are saved but not displayed
+        if self._file.suffix[1:].lower() not in ('jpg', *self._ACCEPTABLE_EMBEDDINGS):
+            kwargs.setdefault('embed', False)
+        IPython.display.Image.__init__(self, filename=str(self._file), **kwargs)
+
+    @property
+    def data(self):
+        if self._data is None and self._file is not None:
+            # small files are kept in the load cache, large ones memory-mapped
+            self._data = load_cache.read(self._file, read_mapped)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        if value is not None:
+            self._file = None  # no longer backed by a file
+
+    def reload(self):
+        if self._file is not None:
+            self._data = None  # read again on next access
+            if self.retina:
+                self._retina_shape()
+        else:
+            super().reload()
+
+    def _ipython_display_(self):
+        if config.preview and (self._file is not None or self._data is not None):
+            from .preview import display_preview
+            display_preview(lambda: self._file if self._file is not None else self.data)
+            return
+        bundle = self._repr_mimebundle_()
+        data, metadata = bundle if isinstance(bundle, tuple) else (bundle, {})
+        IPython.display.display(dict(data, **{'text/plain': repr(self)}), metadata=metadata, raw=True)
+
+    @property
+    def extension(self) -> str:
+        return self.orig_format or self.format
+
+    @property
+    def file_name(self) -> str:
+        return f'{self.label}.{self.extension}'
+
+    def is_current(self) -> bool:
+        if not config.skip_unchanged:
+            return False
+        manifest = get_manifest()
+        if manifest is None:
+            return False
+        if self._file is not None:
+            return self.path.exists() and os.path.samefile(self._file, self.path) \
+                   or manifest.has_source(self.path, self._file)
+        return self.data is not None and manifest.is_current(self.path, self.data)
+
+    def save(self) -> Asset:
+        if self._file is not None:
+            with timed(self, 'write'):
+                if config.object_store:
+                    copy_object_if_changed(self._file, self.path)
+                else:
+                    copy_if_changed(self._file, self.path)
+        else:
+            self._write(self.data)
+        return self
+
+    @timed_method('load')
+    def load(self) -> Asset:
+        self.reload()
+        return self
@@ -0,0 +1,331 @@
+"""Content-hash manifest used to skip writing assets whose output has not changed"""
+
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from .settings import config
+from .timing import note
+
+
+@dataclass
+class WriteStats:
+    """Counts of asset writes performed and skipped (because the file was already current)"""
+    written: int = 0
+    skipped: int = 0
+    bytes_written: int = 0
+    bytes_skipped: int = 0
+
+    def reset(self):
+        self.written = self.skipped = self.bytes_written = self.bytes_skipped = 0
+
+    def __str__(self):
+        return (f'{self.written} files written ({self.bytes_written} bytes), '
+                f'{self.skipped} unchanged files skipped ({self.bytes_skipped} bytes)')
+
+
+write_stats = WriteStats()
+
+# saves may run in background threads (config.async_save)
+_lock = threading.RLock()
+
+# while many files are written, the manifest is saved at most this often (in seconds)
+SAVE_INTERVAL = 1.
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _source_entry(source: Path) -> dict:
+    stat = source.stat()
+    return {'path': str(source.absolute()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class Manifest:
+    """Stores hash, size and mtime of each saved file in a JSON file (loaded lazily)"""
+    file: Path
+
+    def __init__(self, file: Path):
+        self.file = file
+        self._entries = None
+        self._last_save = 0.
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def entries(self) -> Dict[str, dict]:
+        with _lock:
+            if self._entries is None:
+                try:
+                    self._entries = json.loads(self.file.read_text())
+                except (FileNotFoundError, ValueError):
+                    self._entries = {}
+            return self._entries
+
+    def key(self, path: Path) -> str:
+        """Path relative to the manifest folder (absolute if outside of it)"""
+        try:
+            return path.relative_to(self.file.parent).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def is_current(self, path: Path, data: bytes) -> bool:
+        """Whether the file at `path` is unchanged since it was last written with `data`"""
+        return self.has_hash(path, content_hash(data))
+
+    def has_hash(self, path: Path, sha256: str) -> bool:
+        """Whether the file at `path` is unchanged since it was last written with content of this hash"""
+        entry = self.entries.get(self.key(path))
+        if entry is None:
+            return False
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        # a file modified outside of texpro is never current
+        if stat.st_size != entry['size'] or stat.st_mtime_ns != entry['mtime_ns']:
+            return False
+        return entry['sha256'] == sha256
+
+    def has_source(self, path: Path, source: Path) -> bool:
+        """Whether the file at `path` is an unchanged copy of the (unchanged) file `source`"""
+        entry = self.entries.get(self.key(path))
+        if entry is None or entry.get('source') != _source_entry(source):
+            return False
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+
+    def has_fingerprint(self, path: Path, fingerprint: str) -> bool:
+        """Whether the file at `path` is unchanged since it was saved from an object with this fingerprint"""
+        entry = self.entries.get(self.key(path))
+        if entry is None or entry.get('fingerprint') != fingerprint:
+            return False
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+
+    def annotate(self, path: Path, **fields):
+        """Adds fields (e.g. a fingerprint of the saved object) to the entry of a recorded file"""
+        with _lock:
+            entry = self.entries.get(self.key(path))
+            if entry is not None:
+                entry.update(fields)
+                self._changed()
+
+    def record(self, path: Path, sha256: Optional[str], source: Path = None):
+        """Records a written file, by content hash or (for copies) by the file it was copied from"""
+        stat = path.stat()
+        entry = {
+            'sha256': sha256,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        if source is not None:
+            entry['source'] = _source_entry(source)
+        with _lock:
+            self.entries[self.key(path)] = entry
+            self._changed()
+
+    def _changed(self):
+        """Saves the manifest now, or after SAVE_INTERVAL if it was saved just before"""
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.save()
+        elif self._timer is None:
+            self._timer = threading.Timer(SAVE_INTERVAL, self.save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def save(self):
+        with _lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._last_save = time.monotonic()
+            if not self.file.parent.is_dir():
+                return  # keep entries in memory only, e.g. while doc_path does not exist yet
+            # write to a temporary file first, so an interrupted save cannot corrupt the manifest
+            tmp_file = self.file.with_name(self.file.name + '.tmp')
+            tmp_file.write_text(json.dumps(self.entries, sort_keys=True))
+            os.replace(tmp_file, self.file)
+
+    @property
+    def pending(self) -> bool:
+        """Whether there are changes that have not been saved yet"""
+        return self._timer is not None
+
+
+_manifests: Dict[Path, Manifest] = {}
+
+
+def get_manifest() -> Optional[Manifest]:
+    """The manifest belonging to the current config.doc_path (None if there is no doc_path yet)"""
+    file = Path(config.manifest_file)
+    if not file.is_absolute():
+        if config.doc_path is None:
+            return None
+        file = config.abspath(file)
+    with _lock:
+        if file not in _manifests:
+            _manifests[file] = Manifest(file)
+        return _manifests[file]
+
+
+@atexit.register
+def save_manifests():
+    """Saves the manifests with changes that have not been saved yet"""
+    with _lock:
+        for manifest in list(_manifests.values()):
+            if manifest.pending:
+                manifest.save()
+
+
+ASSET_LOG_VARIABLE = 'TEXPRO_ASSET_LOG'
+
+
+def log_asset(path: Path):
+    """Appends a saved path to the file named by $TEXPRO_ASSET_LOG, if set (used by texpro.runner)"""
+    asset_log = os.environ.get(ASSET_LOG_VARIABLE)
+    if asset_log:
+        with _lock, open(asset_log, 'a') as file:
+            file.write(f'{path}\n')
+
+
+def _tmp_file(path: Path) -> Path:
+    return path.with_name(f'.{path.name}.{os.getpid()}-{threading.get_ident()}.tmp')
+
+
+def _discard(tmp_file: Path):
+    if tmp_file.exists():
+        tmp_file.unlink()
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Writes `data` to `path`, unless the file already has this content.  Returns whether it was written.
+
+    The file is replaced atomically, so hardlinks to and memory maps of the old file are not affected."""
+    log_asset(path)
+    manifest = get_manifest() if config.skip_unchanged else None
+    sha256 = content_hash(data) if manifest is not None else None
+    if manifest is not None and manifest.has_hash(path, sha256):
+        _count(written=False, size=len(data))
+        return False
+    tmp_file = _tmp_file(path)
+    try:
+        tmp_file.write_bytes(data)
+    except BaseException:
+        _discard(tmp_file)
+        raise
+    os.replace(tmp_file, path)
+    if manifest is not None:
+        manifest.record(path, sha256)
+    _count(written=True, size=len(data))
+    return True
+
+
+def write_stream_if_changed(path: Path, chunks: Iterable[Union[str, bytes]]) -> bool:
+    """Like write_if_changed, but for content that is generated piece by piece and never held in memory.
+    The chunks are written to a temporary file, which replaces `path` only if its content changed."""
+    log_asset(path)
+    manifest = get_manifest() if config.skip_unchanged else None
+    h = hashlib.sha256()
+    size = 0
+    tmp_file = _tmp_file(path)
+    try:
+        with open(tmp_file, 'wb') as file:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                h.update(chunk)
+                file.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        _discard(tmp_file)
+        raise
+    if manifest is not None and manifest.has_hash(path, h.hexdigest()):
+        tmp_file.unlink()
+        _count(written=False, size=size)
+        return False
+    os.replace(tmp_file, path)
+    if manifest is not None:
+        manifest.record(path, h.hexdigest())
+    _count(written=True, size=size)
+    return True
+
+
+def _copy_file(source: Path, target: Path):
+    """Copies a file inside the kernel (copy_file_range, or sendfile via shutil), without reading it into Python"""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            return
+        except OSError:
+            pass  # e.g. not supported by the filesystem
+    shutil.copyfile(source, target)
+
+
+def copy_if_changed(source: Path, path: Path) -> bool:
+    """Copies the file `source` to `path`, unless it was copied before and neither file has changed since.
+    Returns whether it was copied.
+
+    With config.hardlink_files, `path` becomes a hardlink to `source` if both are on the same filesystem.
+    """
+    log_asset(path)
+    size = source.stat().st_size
+    if path.exists() and os.path.samefile(source, path):
+        _count(written=False, size=size)
+        return False
+    manifest = get_manifest() if config.skip_unchanged else None
+    if manifest is not None and manifest.has_source(path, source):
+        _count(written=False, size=size)
+        return False
+    tmp_file = _tmp_file(path)
+    try:
+        try:
+            if not config.hardlink_files:
+                raise OSError('hardlinks are disabled')
+            os.link(source, tmp_file)
+        except OSError:
+            _copy_file(source, tmp_file)
+    except BaseException:
+        _discard(tmp_file)
+        raise
+    os.replace(tmp_file, path)
+    if manifest is not None:
+        manifest.record(path, None, source=source)
+    _count(written=True, size=size)
+    return True
+
+
+def record_skip(path: Path):
+    """Counts a save that was skipped without rendering, because the file at `path` is current"""
+    log_asset(path)
+    _count(written=False, size=path.stat().st_size)
+
+
+def _count(written: bool, size: int):
+    note(**{'bytes_written' if written else 'bytes_skipped': size})
+    with _lock:
+        if written:
+            write_stats.written += 1
+            write_stats.bytes_written += size
+        else:
+            write_stats.skipped += 1
+            write_stats.bytes_skipped += size
@@ -0,0 +1,175 @@
+"""A content-addressed store of saved images and plots (config.object_store), so that identical files saved
+under several labels or folders are kept on disk only once.
+
+Blobs are read-only, and so are the saved files that are hardlinks to them: editing one in place would change all
+files with the same content.  Reflinked and copied files are independent of their blob and stay writable."""
+
+import hashlib
+import os
+import stat
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Set
+
+from .manifest import _copy_file, _count, _discard, _lock, _tmp_file, content_hash, get_manifest, log_asset
+from .settings import config
+
+FICLONE = 0x40049409  # Linux ioctl creating a copy-on-write clone (reflink) of a file
+
+
+def object_folder() -> Path:
+    return config.abspath(config.object_path)
+
+
+def _reflink(source: Path, target: Path):
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        raise OSError('reflinks are not supported')
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            target.unlink()
+            raise
+
+
+def link_object(blob: Path, path: Path) -> str:
+    """Replaces `path` (atomically) by a hardlink to the blob, or a reflink or copy of it.  Returns which."""
+    tmp_file = _tmp_file(path)
+    try:
+        try:
+            os.link(blob, tmp_file)
+            method = 'hardlink'
+        except OSError:  # e.g. another filesystem, or one without hardlinks
+            try:
+                _reflink(blob, tmp_file)
+                method = 'reflink'
+            except OSError:
+                _copy_file(blob, tmp_file)
+                method = 'copy'
+    except BaseException:
+        _discard(tmp_file)
+        raise
+    try:
+        os.replace(tmp_file, path)
+    except PermissionError:
+        # Windows does not replace read-only files, e.g. an earlier hardlink to a blob.  Making it writable also
+        # makes the blob it links to writable, which is only a safeguard against editing it in place.
+        try:
+            read_only = not os.stat(path).st_mode & stat.S_IWUSR
+        except FileNotFoundError:
+            read_only = False
+        if not read_only:
+            _discard(tmp_file)
+            raise
+        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+        os.replace(tmp_file, path)
+    return method
+
+
+def _add_object(sha256: str, write) -> Path:
+    """The blob with this hash, created with write(tmp_file) if it does not exist yet"""
+    folder = object_folder()
+    blob = folder / sha256
+    if not blob.exists():
+        folder.mkdir(parents=True, exist_ok=True)
+        tmp_file = _tmp_file(blob)
+        try:
+            write(tmp_file)
+            os.chmod(tmp_file, 0o444)  # blobs are shared, so they must never be changed in place
+        except BaseException:
+            _discard(tmp_file)
+            raise
+        os.replace(tmp_file, blob)
+    return blob
+
+
+def write_object_if_changed(path: Path, data: bytes) -> bool:
+    """Like manifest.write_if_changed, but `path` is linked to a blob in the object store"""
+    log_asset(path)
+    sha256 = content_hash(data)
+    manifest = get_manifest() if config.skip_unchanged else None
+    if manifest is not None and manifest.has_hash(path, sha256):
+        _count(written=False, size=len(data))
+        return False
+    link_object(_add_object(sha256, lambda tmp_file: tmp_file.write_bytes(data)), path)
+    if manifest is not None:
+        manifest.record(path, sha256)
+    _count(written=True, size=len(data))
+    return True
+
+
+def _file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def copy_object_if_changed(source: Path, path: Path) -> bool:
+    """Like manifest.copy_if_changed, but `path` is linked to a blob (copied from `source`) in the object store"""
+    log_asset(path)
+    size = source.stat().st_size
+    manifest = get_manifest() if config.skip_unchanged else None
+    if manifest is not None and manifest.has_source(path, source):
+        _count(written=False, size=size)
+        return False
+    sha256 = _file_hash(source)
+    link_object(_add_object(sha256, lambda tmp_file: _copy_file(source, tmp_file)), path)
+    if manifest is not None:
+        manifest.record(path, sha256, source=source)
+    _count(written=True, size=size)
+    return True
+
+
+@dataclass
+class GcResult:
+    removed: int = 0
+    bytes_reclaimed: int = 0
+    kept: int = 0
+
+    def __str__(self):
+        return f'{self.removed} unused objects removed ({self.bytes_reclaimed} bytes), {self.kept} kept'
+
+
+def _referenced() -> Set[str]:
+    """Hashes of the (unchanged) files recorded in the manifest"""
+    manifest = get_manifest()
+    if manifest is None:
+        return set()
+    referenced = set()
+    with _lock:
+        entries = list(manifest.entries.items())
+    for key, entry in entries:
+        path = Path(key) if Path(key).is_absolute() else manifest.file.parent / key
+        if entry.get('sha256') and manifest.has_hash(path, entry['sha256']):
+            referenced.add(entry['sha256'])
+    return referenced
+
+
+def gc(dry_run: bool = False) -> GcResult:
+    """Removes the blobs that no saved file uses any more: blobs without other hardlinks, that are not the
+    content of a file recorded in the manifest (reflinked and copied files do not depend on their blob, but
+    keeping it avoids storing their content again).  With dry_run, only reports what would be removed."""
+    result = GcResult()
+    folder = object_folder()
+    if not folder.is_dir():
+        return result
+    referenced = _referenced()
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or not entry.is_file():
+                continue  # e.g. a blob that is just being written
+            stat = entry.stat()
+            if stat.st_nlink > 1 or entry.name in referenced:
+                result.kept += 1
+                continue
+            if not dry_run:
+                os.unlink(entry.path)
+            result.removed += 1
+            result.bytes_reclaimed += stat.st_size
+    return result
+
@@ -0,0 +1,191 @@
+"""Downscaled notebook previews of images and plots (config.preview), cached on disk by content hash (or by path
+and modification time of files), and bounded HTML previews of tables (config.html_max_rows etc.)"""
+
+import base64
+import contextvars
+import copy
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from .settings import config
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix='texpro-preview')
+        return _executor
+
+
+def _key(source: Union[bytes, Path]) -> str:
+    """Hash of the data, or of the real path, modification time and size of a file (without reading it)"""
+    if isinstance(source, Path):
+        stat = os.stat(source)
+        source = f'{os.path.realpath(source)}:{stat.st_mtime_ns}:{stat.st_size}'.encode()
+    return hashlib.sha256(source).hexdigest()
+
+
+def downscale(source: Union[bytes, Path], max_width: int, format: str) -> bytes:
+    """Shrinks an image to at most max_width pixels wide and encodes it as png or webp"""
+    from PIL import Image
+
+    image = Image.open(source if isinstance(source, Path) else io.BytesIO(source))
+    image.draft('RGB', (max_width, max_width * image.height // image.width))  # fast decoding of large jpegs
+    if image.width > max_width:
+        image.thumbnail((max_width, max_width * image.height // image.width))
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+        image = image.convert('RGBA')
+    buffer = io.BytesIO()
+    if format == 'webp':
+        image.save(buffer, format='WEBP', quality=80)
+    else:
+        image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _cache_folder() -> Optional[Path]:
+    if config.doc_path is None and not config.preview_path.is_absolute():
+        return None
+    return config.abspath(config.preview_path)
+
+
+def make_preview(source: Union[bytes, Path]) -> bytes:
+    """The preview of an image (given as data or file), from the disk cache if it was made before"""
+    max_width, format = config.preview_max_width, config.preview_format
+    folder = _cache_folder()
+    if folder is None:
+        return downscale(source, max_width, format)
+    file = folder / f'{_key(source)}-{max_width}.{format}'
+    if file.is_file():
+        return file.read_bytes()
+    preview = downscale(source, max_width, format)
+    folder.mkdir(parents=True, exist_ok=True)
+    tmp_file = file.with_name(f'.{file.name}.{os.getpid()}-{threading.get_ident()}.tmp')
+    tmp_file.write_bytes(preview)
+    os.replace(tmp_file, file)
+    return preview
+
+
+def submit_preview(source: Callable[[], Union[bytes, Path]]) -> Future:
+    """Makes a preview in a background thread"""
+    context = contextvars.copy_context()  # with the config overrides of the caller
+    return _get_executor().submit(context.run, lambda: make_preview(source()))
+
+
+def _display_object(preview: bytes):
+    from IPython.display import HTML, Image
+
+    if config.preview_format == 'png':
+        return Image(data=preview, format='png')
+    # IPython.display.Image cannot embed webp
+    encoded = base64.b64encode(preview).decode('ascii')
+    return HTML(f'<img src="data:image/{config.preview_format};base64,{encoded}"/>')
+
+
+def _result_object(future: Future):
+    from IPython.display import HTML
+
+    try:
+        return _display_object(future.result())
+    except Exception as e:
+        return HTML(f'<i>Preview could not be rendered: {e!r}</i>')
+
+
+def display_preview(source: Callable[[], Union[bytes, Path]], wait: float = .1):
+    """Displays the preview of an image without blocking: if it is not ready within `wait` seconds, a
+    placeholder is shown and replaced once the preview has been rendered"""
+    from IPython.display import HTML, display
+
+    future = submit_preview(source)
+    try:
+        future.exception(timeout=wait)
+    except TimeoutError:
+        handle = display(HTML('<i>Rendering preview&hellip;</i>'), display_id=True)
+        future.add_done_callback(lambda f: handle.update(_result_object(f)))
+        return
+    display(_result_object(future))
+
+
+def _too_large(kind: str, shape: str, max_bytes: int) -> str:
+    return f'<i>{kind} with {shape} is too large to preview in {max_bytes} bytes</i>'
+
+
+def table_html(df, max_rows: Optional[int] = 'config.html_max_rows',
+               max_columns: Optional[int] = 'config.html_max_columns',
+               max_bytes: Optional[int] = 'config.html_max_bytes') -> str:
+    """HTML of the first and last rows and columns of a DataFrame (only those are formatted), shown with
+    fewer of them while it is larger than max_bytes"""
+    max_rows, max_columns, max_bytes = (config.get_or_return(value) for value in (max_rows, max_columns, max_bytes))
+    rows, columns = df.shape
+    max_rows = rows if max_rows is None else min(max_rows, rows)
+    max_columns = columns if max_columns is None else min(max_columns, columns)
+    while True:
+        html = df.to_html(max_rows=max_rows, max_cols=max_columns, show_dimensions='truncate')
+        if max_bytes is None or len(html.encode()) <= max_bytes:
+            return html
+        if max_rows <= 2 and max_columns <= 2:
+            return _too_large('DataFrame', f'{rows} rows \N{MULTIPLICATION SIGN} {columns} columns', max_bytes)
+        if max_rows > 2:
+            max_rows //= 2
+        else:
+            max_columns //= 2
+
+
+def table_latex(tex: Callable[[], str], rows: int, columns: int,
+                max_rows: Optional[int] = 'config.html_max_rows', max_columns: Optional[int] = 'config.html_max_columns',
+                max_bytes: Optional[int] = 'config.html_max_bytes') -> Optional[str]:
+    """The LaTeX of a table for notebooks, or None (nothing is stored) if its HTML preview is truncated or the
+    LaTeX is larger than max_bytes"""
+    max_rows, max_columns, max_bytes = (config.get_or_return(value) for value in (max_rows, max_columns, max_bytes))
+    if (max_rows is not None and rows > max_rows) or (max_columns is not None and columns > max_columns):
+        return None
+    tex = tex()
+    if max_bytes is not None and len(tex.encode()) > max_bytes:
+        return None
+    return tex
+
+
+def _head_models(stargazer, n_models: int, n_covariates: int):
+    """A copy of a Stargazer table with only its first models and covariates"""
+    head = copy.copy(stargazer)
+    head.models = stargazer.models[:n_models]
+    head.model_data = stargazer.model_data[:n_models]
+    head.num_models = len(head.models)
+    head.cov_names = stargazer.cov_names[:n_covariates]
+    head.custom_lines = type(stargazer.custom_lines)(list, {
+        location: [line[:n_models + 1] for line in lines] for location, lines in stargazer.custom_lines.items()})
+    if isinstance(stargazer.column_labels, list):
+        labels, separators, covered = [], [], 0
+        for label, separator in zip(stargazer.column_labels, stargazer.column_separators):
+            if covered < n_models:
+                labels.append(label)
+                separators.append(min(separator, n_models - covered))
+                covered += separator
+        head.column_labels, head.column_separators = labels, separators
+    return head
+
+
+def stargazer_html(stargazer, max_rows: Optional[int] = 'config.html_max_rows',
+                   max_columns: Optional[int] = 'config.html_max_columns',
+                   max_bytes: Optional[int] = 'config.html_max_bytes') -> str:
+    """HTML of a Stargazer table, with only its first max_columns models and max_rows covariates"""
+    max_rows, max_columns, max_bytes = (config.get_or_return(value) for value in (max_rows, max_columns, max_bytes))
+    models, covariates = stargazer.num_models, len(stargazer.cov_names)
+    max_rows = covariates if max_rows is None else min(max_rows, covariates)
+    max_columns = models if max_columns is None else min(max_columns, models)
+    truncated = max_rows < covariates or max_columns < models
+    html = (_head_models(stargazer, max_columns, max_rows) if truncated else stargazer).render_html()
+    if truncated:
+        html += f'<p>{max_columns} of {models} models, {max_rows} of {covariates} covariates</p>'
+    if max_bytes is not None and len(html.encode()) > max_bytes:
+        return _too_large('Stargazer table', f'{models} models', max_bytes)
+    return html
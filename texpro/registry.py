@@ -0,0 +1,214 @@
+"""Index of all assets created in this process (and, via the index file, by earlier runs and other notebooks)"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import weakref
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from warnings import warn
+
+from .settings import config
+
+
+class DuplicateLabelWarning(UserWarning):
+    """An asset overwrites the file of an asset created elsewhere, or reuses its LaTeX label"""
+
+
+_script = None  # the script of this process, see current_origin
+
+
+def current_origin() -> str:
+    """Where assets are created: the notebook (if Jupyter reports it) or script"""
+    global _script
+    session = os.environ.get('JPY_SESSION_NAME')
+    if session:
+        return session
+    if _script is None:
+        _script = os.path.abspath(sys.argv[0]) if sys.argv and sys.argv[0] else '<interactive>'
+    return _script
+
+
+def _key(path) -> str:
+    """Absolute, normalized path (symlinks are not resolved, which would take system calls for every asset)"""
+    return os.path.normpath(os.path.abspath(path))
+
+
+@dataclass
+class AssetRecord:
+    type: str
+    label: str
+    path: str  # absolute path
+    tex_label: Optional[str] = None
+    origin: str = ''
+    asset: Optional[weakref.ref] = field(default=None, compare=False, repr=False)
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if key != 'asset'}
+
+    def get_asset(self):
+        """The asset object, if it was created in this process and still exists"""
+        return self.asset() if self.asset is not None else None
+
+
+class Registry:
+    """Looks up assets by path, label, tex_label or type in constant time"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.by_path: Dict[str, AssetRecord] = {}
+        self.by_label: Dict[str, Set[str]] = {}
+        self.by_tex_label: Dict[str, str] = {}
+        self.by_type: Dict[str, Set[str]] = {}
+        self.duplicates: List[tuple] = []  # (new record, record it conflicts with)
+        self._index_files: Set[Path] = set()
+        self._loaded: Set[tuple] = set()  # (doc_path, index_file) whose index files were loaded
+
+    def __len__(self):
+        return len(self.by_path)
+
+    def __iter__(self):
+        return iter(list(self.by_path.values()))
+
+    def __contains__(self, path) -> bool:
+        return _key(path) in self.by_path
+
+    def get(self, path) -> Optional[AssetRecord]:
+        return self.by_path.get(_key(path))
+
+    def find(self, label: str = None, type: str = None, tex_label: str = None) -> List[AssetRecord]:
+        """All records matching the given label, type name (e.g. 'TexTable') and/or tex_label"""
+        candidates = None
+        if tex_label is not None:
+            candidates = {self.by_tex_label[tex_label]} if tex_label in self.by_tex_label else set()
+        for index, key in ((self.by_label, label), (self.by_type, type)):
+            if key is not None:
+                paths = index.get(key, set())
+                candidates = paths if candidates is None else candidates & paths
+        if candidates is None:
+            candidates = self.by_path.keys()
+        return [self.by_path[path] for path in candidates]
+
+    def _add(self, record: AssetRecord):
+        self._remove(record.path)
+        self.by_path[record.path] = record
+        self.by_label.setdefault(record.label, set()).add(record.path)
+        self.by_type.setdefault(record.type, set()).add(record.path)
+        if record.tex_label is not None:
+            self.by_tex_label[record.tex_label] = record.path
+
+    def _remove(self, path: str):
+        record = self.by_path.pop(path, None)
+        if record is None:
+            return
+        self.by_label[record.label].discard(path)
+        self.by_type[record.type].discard(path)
+        if record.tex_label is not None and self.by_tex_label.get(record.tex_label) == path:
+            del self.by_tex_label[record.tex_label]
+
+    def register(self, asset):
+        """Adds an asset, warning if it conflicts with an asset created elsewhere"""
+        if getattr(asset, 'label', None) is None:
+            return
+        if config.doc_path is None and not asset.rel_path.is_absolute():
+            return  # no doc_path set yet
+        path = os.path.normpath(asset.path)  # already absolute
+        record = AssetRecord(type=type(asset).__name__, label=asset.label, path=path,
+                             tex_label=getattr(asset, 'tex_label', None), origin=current_origin(),
+                             asset=weakref.ref(asset))
+        with self._lock:
+            self._load_index()
+            conflicts = []
+            existing = self.by_path.get(record.path)
+            if existing is not None and existing.origin != record.origin:
+                conflicts.append((existing, f'{path} was already saved by {existing.origin}'))
+            other_path = self.by_tex_label.get(record.tex_label) if record.tex_label is not None else None
+            if other_path is not None and other_path != record.path and self._same_document(other_path, path):
+                other = self.by_path[other_path]
+                conflicts.append((other, f'LaTeX label {record.tex_label} is also used by {other_path}'))
+            for other, message in conflicts:
+                self.duplicates.append((record, other))
+                warn(message, DuplicateLabelWarning)
+            self._add(record)
+
+    @staticmethod
+    def _same_document(path: str, other_path: str) -> bool:
+        """Whether both paths are inside the current doc_path (LaTeX labels only clash within a document)"""
+        if config.doc_path is None:
+            return True
+        root = _key(config.doc_path)
+        return os.path.commonpath([root, path]) == root and os.path.commonpath([root, other_path]) == root
+
+    def clear(self):
+        """Forgets all records (the index files are not changed)"""
+        with self._lock:
+            for index in (self.by_path, self.by_label, self.by_tex_label, self.by_type):
+                index.clear()
+            self.duplicates.clear()
+            self._index_files.clear()
+            self._loaded.clear()
+
+    def _load_index(self):
+        """Loads the index file of the current doc_path, once"""
+        doc_path = config.doc_path
+        key = (doc_path, config.index_file)
+        if doc_path is not None and not doc_path.is_absolute():
+            key += (os.getcwd(),)
+        if key in self._loaded:
+            return
+        if config.doc_path is None and not Path(config.index_file).is_absolute():
+            return
+        self._loaded.add(key)
+        file = config.abspath(Path(config.index_file))
+        if file not in self._index_files:
+            self._index_files.add(file)
+            self.load(file)
+
+    def load(self, file: Path = None):
+        """Adds the records of an index file (default: config.index_file), keeping records of this process"""
+        file = Path(file) if file is not None else config.abspath(Path(config.index_file))
+        try:
+            records = json.loads(file.read_text())
+        except (FileNotFoundError, ValueError):
+            return
+        with self._lock:
+            for entry in records:
+                if entry['path'] not in self.by_path:
+                    self._add(AssetRecord(**entry))
+
+    def save(self, file: Path = None):
+        """Writes the records of all assets inside the index file's folder (default: config.index_file).
+
+        The index file is read again first, and the assets created in this process are merged into it, so that
+        processes saving the same index file (e.g. notebooks run in parallel) keep each other's records.
+        """
+        file = Path(file) if file is not None else config.abspath(Path(config.index_file))
+        folder = _key(file.parent)
+        with self._lock:
+            records = {record.path: record.to_dict() for record in self.by_path.values()
+                       if os.path.commonpath([folder, record.path]) == folder}
+            created = {path for path, record in self.by_path.items() if record.asset is not None}
+        if not os.path.isdir(folder):
+            return
+        try:
+            saved = json.loads(file.read_text())
+        except (FileNotFoundError, ValueError):
+            saved = []
+        for entry in saved:
+            if entry['path'] not in created:
+                records[entry['path']] = entry  # possibly newer than the version loaded by this process
+        tmp_file = file.with_name(f'.{file.name}.{os.getpid()}.tmp')
+        tmp_file.write_text(json.dumps(sorted(records.values(), key=lambda record: record['path']), indent=1))
+        os.replace(tmp_file, file)
+
+    def save_all(self):
+        """Writes all index files used by this process"""
+        for file in list(self._index_files):
+            self.save(file)
+
+
+registry = Registry()
+atexit.register(registry.save_all)
@@ -0,0 +1,124 @@
+"""Executing many notebooks in parallel, skipping those whose code and data have not changed"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from .manifest import ASSET_LOG_VARIABLE
+from .utils import run_notebook
+
+DEFAULT_STATE_FILE = Path('.texpro-runs.json')
+
+
+@dataclass
+class NotebookResult:
+    notebook: Path
+    executed: bool  # False if the notebook was up to date
+    seconds: float = 0.
+    assets: List[str] = field(default_factory=list)  # files saved by texpro while running
+    error: Optional[str] = None
+
+
+def data_hash(data: Iterable[Path]) -> str:
+    """Hash of the names and contents of data files"""
+    h = hashlib.sha256()
+    for path in sorted(data):
+        h.update(str(path).encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def notebook_hash(notebook: Path, kernel: str, data: Iterable[Path] = (), data_digest: str = None) -> str:
+    """Hash of the notebook's cell sources (not its outputs), the kernel and the data files it depends on (or
+    their data_hash, if already computed)"""
+    h = hashlib.sha256(kernel.encode())
+    for cell in json.loads(notebook.read_text(encoding='utf-8'))['cells']:
+        source = cell['source']
+        h.update(cell['cell_type'].encode())
+        h.update((''.join(source) if isinstance(source, list) else source).encode())
+    h.update((data_hash(data) if data_digest is None else data_digest).encode())
+    return h.hexdigest()
+
+
+def _execute(notebook: Path, kernel: str, allow_errors: bool) -> NotebookResult:
+    """Runs one notebook, recording the assets that texpro saves in its kernel"""
+    with tempfile.NamedTemporaryFile('r', suffix='.txt') as asset_log:
+        # the kernel inherits the environment of this process
+        os.environ[ASSET_LOG_VARIABLE] = asset_log.name
+        start = time.perf_counter()
+        try:
+            run_notebook(notebook, kernel=kernel, allow_errors=allow_errors)
+            error = None
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        finally:
+            del os.environ[ASSET_LOG_VARIABLE]
+        seconds = time.perf_counter() - start
+        assets = sorted(set(asset_log.read().splitlines()))
+    return NotebookResult(notebook, executed=True, seconds=seconds, assets=assets, error=error)
+
+
+def run_notebooks(notebooks: Iterable[Union[str, Path]], kernel: str = '', workers: int = None,
+                  data: Iterable[Union[str, Path]] = (), force: bool = False, allow_errors: bool = False,
+                  state_file: Union[str, Path] = DEFAULT_STATE_FILE) -> Dict[Path, NotebookResult]:
+    """Executes notebooks in parallel processes, each with its own kernel (defaults to one per CPU; with
+    workers=1, they are run one after another without a process pool).
+
+    Notebooks whose cell sources, kernel and `data` files are unchanged since their last successful run are
+    skipped, unless `force` is set.  The hashes, run times and saved assets are kept in `state_file`.
+    """
+    notebooks = [Path(notebook).absolute() for notebook in notebooks]
+    data = [Path(path) for path in data]
+    state_file = Path(state_file)
+    try:
+        state = json.loads(state_file.read_text())
+    except (FileNotFoundError, ValueError):
+        state = {}
+
+    results = {}
+    digest = data_hash(data)  # the data is shared by all notebooks: read it once
+    hashes = {notebook: notebook_hash(notebook, kernel, data_digest=digest) for notebook in notebooks}
+    to_run = []
+    for notebook in notebooks:
+        previous = state.get(str(notebook))
+        if not force and previous and previous['hash'] == hashes[notebook]:
+            results[notebook] = NotebookResult(notebook, executed=False, assets=previous['assets'])
+        else:
+            to_run.append(notebook)
+
+    if to_run:
+        if workers == 1:
+            # one after another from this process (each notebook still gets its own kernel)
+            executed = [_execute(notebook, kernel, allow_errors) for notebook in to_run]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_execute, notebook, kernel, allow_errors) for notebook in to_run]
+                executed = [future.result() for future in futures]
+        for result in executed:
+            results[result.notebook] = result
+            if result.error is None:
+                state[str(result.notebook)] = dict(hash=hashes[result.notebook], seconds=result.seconds,
+                                                   assets=result.assets)
+        state_file.write_text(json.dumps(state, indent=1))
+
+    return {notebook: results[notebook] for notebook in notebooks}
+
+
+def summary(results: Dict[Path, NotebookResult]) -> str:
+    """One line per notebook with its status, run time and number of saved assets"""
+    lines = []
+    for result in results.values():
+        status = 'failed' if result.error else 'executed' if result.executed else 'up to date'
+        lines.append(f'{result.notebook.name}: {status}, {result.seconds:.1f}s, {len(result.assets)} assets'
+                     + (f'\n\t{result.error}' if result.error else ''))
+    return '\n'.join(lines)
+
+
+def as_dicts(results: Dict[Path, NotebookResult]) -> List[dict]:
+    return [dict(asdict(result), notebook=str(result.notebook)) for result in results.values()]
@@ -1,9 +1,12 @@
+import os
 import re
-from dataclasses import dataclass
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List
 
-from texpro.utils import check_valid, tree, warn_if_not_dir
+from texpro.utils import check_valid, tree, tree_dict, warn_if_not_dir
 
 DEFAULT_EQ_TEMPLATE = r'''\begin{{{block}}}\label{{{label}}}
 {eq}
@@ -30,6 +33,14 @@ IMAGE_TYPES = []
 PLOT_TYPES = IMAGE_TYPES
 
 
+# settings overridden with config.override(), per thread and asyncio task
+_overrides: ContextVar[dict] = ContextVar('texpro_config_overrides', default={})
+
+# absolute paths by (doc_path, path), plus the working directory if doc_path is relative
+_abspaths: Dict[tuple, Path] = {}
+_ABSPATHS_SIZE = 4096
+
+
 @dataclass
 class _Config:
     doc_path: Path = None  # absolute or relative to current directory
@@ -48,19 +59,64 @@ class _Config:
     tab_prefix: str = 'tab:'
     tab_template: str = DEFAULT_TAB_TEMPLATE
     tab_formatting: str = DEFAULT_TAB_FORMATTING
+    tab_engine: str = 'to_latex'  # or 'native' (texpro.tabular), for very large tables
 
     snip_path: Path = Path('.')  # absolute or relative to doc_path
 
+    preview_path: Path = Path('./.texpro-previews')  # absolute or relative to doc_path
+    preview_max_width: int = 800  # pixels
+    preview_format: str = 'png'  # or 'webp'
+    preview_dpi: int = 100  # resolution of plot previews
+    html_max_rows: int = 60  # rows of tables shown in notebooks (the first and last ones), None: all
+    html_max_columns: int = 20  # columns (or models of stargazer tables) shown in notebooks, None: all
+    html_max_bytes: int = 2 ** 20  # tables shown in notebooks are shrunk to fit, None: no limit
+
+    url_cache_path: Path = Path('~/.cache/texpro/urls').expanduser()  # images downloaded by Image(url=...)
+    url_cache_size: int = 512 * 2 ** 20  # bytes, least recently used urls are removed beyond this
+    fetch_workers: int = 8  # concurrent downloads, see texpro.fetch.prefetch
+    fetch_timeout: float = 30.  # seconds
+
+    # in vector plots, rasterize collections and lines with more points than this (None: never)
+    rasterize_threshold: int = None
+    rasterize_dpi: int = 300  # resolution of rasterized parts of vector plots
+
     # behaviour
     check_paths: bool = False
     save: bool = True
     auto_save: bool = True
     auto_load: bool = True
     add_percent: bool = True
+    preview: bool = False  # display downscaled previews of images and plots (see texpro.preview)
+    skip_unchanged: bool = True  # do not rewrite files whose content has not changed
+    targets: tuple = ()  # doc_paths (or dicts of settings) that auto save writes to, see texpro.targets
+    async_save: bool = False  # auto save in background threads, see texpro.flush()
+    save_workers: int = 4  # threads used by async_save
+    save_queue_size: int = 64  # maximum number of pending background saves
+    render_cache_size: int = 32  # number of rendered tables kept in memory
+    load_cache_size: int = 64 * 2 ** 20  # bytes of loaded files kept in memory, see texpro.preload
+    hardlink_files: bool = False  # save images from files as hardlinks instead of copies, where possible
+    manifest_file: str = '.texpro-manifest.json'  # absolute or relative to doc_path
+    object_store: bool = False  # keep identical images and plots only once, see texpro.objects
+    object_path: Path = Path('./.texpro-objects')  # absolute or relative to doc_path
+    index_file: str = '.texpro-index.json'  # absolute or relative to doc_path, see texpro.registry
+    timing: bool = True  # record render and write times of each asset, see texpro.stats()
+    tree_ignore: tuple = ('.git', '.tex-build', '.ipynb_checkpoints', '__pycache__')  # glob patterns
+    tree_max_entries: int = 100  # per directory in file_tree, the rest is summarized
+
+    def __getattribute__(self, name):
+        overrides = _overrides.get()
+        if overrides and name in overrides:
+            return overrides[name]
+        return super().__getattribute__(name)
 
     def __setattr__(self, name, value):
         if name.endswith('path') and value is not None and not isinstance(value, Path):
             value = Path(value)
+        overrides = _overrides.get()
+        if overrides and name in overrides:
+            # changes the override of the current context, not the global setting
+            _overrides.set({**overrides, name: value})
+            return
         if name == 'doc_path':
             if self.check_paths:
                 warn_if_not_dir(value)
@@ -74,10 +130,35 @@ class _Config:
         """Absolute path from doc_path, used to save and load files"""
         if path.is_absolute():
             return path
-        if self.doc_path is None:
+        doc_path = self.doc_path
+        if doc_path is None:
             raise Exception('You need to set a path for the document root first, '
                             'using texpro.config.doc_path = "/your/path".')
-        return (self.doc_path / path).absolute()
+        key = (doc_path, path) if doc_path.is_absolute() else (os.getcwd(), doc_path, path)
+        result = _abspaths.get(key)
+        if result is None:
+            if len(_abspaths) >= _ABSPATHS_SIZE:
+                _abspaths.clear()
+            result = _abspaths[key] = (doc_path / path).absolute()
+        return result
+
+    @contextmanager
+    def override(self, **settings):
+        """Changes settings only within a `with` block, and only for the current thread or asyncio task, e.g.
+        `with config.override(doc_path='slides'):`.  Other threads and tasks keep their settings, so documents
+        can be exported concurrently.  Overridden paths are not checked (see check_paths).
+        """
+        names = {field.name for field in fields(self)}
+        for name, value in settings.items():
+            if name not in names:
+                raise AttributeError(f'config has no setting {name!r}')
+            if name.endswith('path') and value is not None and not isinstance(value, Path):
+                settings[name] = Path(value)
+        token = _overrides.set({**_overrides.get(), **settings})
+        try:
+            yield self
+        finally:
+            _overrides.reset(token)
 
     @property
     def asset_paths(self) -> List[Path]:
@@ -95,15 +176,39 @@ class _Config:
             path.mkdir(parents=True, exist_ok=exist_ok)
 
     @property
-    def file_tree(self) -> List[str]:
+    def _tree_exclude(self) -> List[str]:
+        exclude = [Path(self.manifest_file).name, Path(self.index_file).name, self.preview_path.name,
+                   self.object_path.name, *self.tree_ignore]
+        if self.doc_path is not None:
+            # usually outside doc_path; matched by path, as its name (e.g. urls) may well be used in the document
+            url_cache_path = self.abspath(self.url_cache_path)
+            if self.doc_path.absolute() in url_cache_path.parents:
+                exclude.append(str(url_cache_path))
+        return exclude
+
+    def iter_file_tree(self, max_depth: int = None, max_entries: int = 'config.tree_max_entries',
+                       summary: bool = True) -> Iterator[str]:
+        """The lines of a visual tree of the doc_path folder, listed lazily (see utils.tree)"""
+        max_entries = self.get_or_return(max_entries)
+        yield str(self.doc_path)
+        yield from tree(self.doc_path, exclude=self._tree_exclude, max_depth=max_depth, max_entries=max_entries,
+                        summary=summary)
+
+    @property
+    def file_tree(self) -> str:
         """A visual tree of the doc_path folder"""
-        return '\n'.join([str(self.doc_path)] + list(tree(self.doc_path)))
+        return '\n'.join(self.iter_file_tree())
+
+    def file_tree_dict(self, max_depth: int = None, max_entries: int = 'config.tree_max_entries') -> dict:
+        """The structure of the doc_path folder as nested dicts, e.g. for json.dumps (see utils.tree_dict)"""
+        return tree_dict(self.doc_path, exclude=self._tree_exclude, max_depth=max_depth,
+                         max_entries=self.get_or_return(max_entries))
 
     _attribute_re = re.compile(r'^config\.(\w+)$')
 
     def get_or_return(self, key: str):
         """If `key` is of the format 'config.*', returns `self.*`, otherwise returns `key`"""
-        match = self._attribute_re.match(key)
+        match = self._attribute_re.match(key) if isinstance(key, str) else None
         if match:
             return getattr(self, match.group(1))
         else:
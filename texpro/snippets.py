@@ -0,0 +1,126 @@
+"""Many snippets (e.g. all numbers cited in the text) in a single file of LaTeX macros"""
+
+import re
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Union
+
+import numpy as np
+import pandas as pd
+
+from .cache import load_cache
+from .settings import config
+from .tabular import format_column
+from .texassets import TexAsset
+from .timing import timed_method
+
+_KEY_RE = re.compile(r'^[A-Za-z0-9_.:\-]+$')
+_COMMAND_RE = re.compile(r'^[A-Za-z]+$')
+_UNESCAPED_PERCENT_RE = re.compile(r'(?<!\\)%$')
+
+
+def format_values(values: pd.Series, float_format: Union[str, Callable] = '%.3f', na_rep: str = '') -> pd.Series:
+    """Formats numbers as strings, all floats at once (strings are kept as they are, i.e. as LaTeX)"""
+    if values.dtype.kind in 'iufb':
+        return format_column(values, float_format, na_rep, escape=False)
+    values = values.astype(object)
+    is_float = np.fromiter((isinstance(value, (float, np.floating)) for value in values), bool, len(values))
+    formatted = values.map(lambda value: na_rep if value is None else str(value))
+    if is_float.any():
+        formatted[is_float] = format_column(values[is_float].astype(float), float_format, na_rep, escape=False)
+    return formatted
+
+
+def _flatten(values, sep: str) -> pd.Series:
+    """A Series of values by key, from a dict, Series or DataFrame (keyed `<index><sep><column>`)"""
+    if isinstance(values, pd.DataFrame):
+        try:
+            stacked = values.stack(future_stack=True)
+        except TypeError:  # pandas < 2.1
+            stacked = values.stack(dropna=False)
+        stacked.index = [f'{row}{sep}{column}' for row, column in stacked.index]
+        return stacked
+    if isinstance(values, pd.Series):
+        return values.rename(index=str)
+    return pd.Series(dict(values), dtype=object)
+
+
+class SnippetBank(TexAsset):
+    """Saves many values into one file of macros, instead of one TexSnippet file each.
+
+    After `\\input{<folder>/<label>}` in the preamble, `\\<command>{<key>}` prints a value (`??` if the key is
+    unknown).  The command defaults to the label, which then may only contain letters; LaTeX reports an error if
+    it is defined already (e.g. `table`).  DataFrames are saved with keys `<index><sep><column>`.  Use update()
+    to change some values and keep the others.
+    """
+    values: Dict[str, str]  # formatted, by key
+    render_settings = ('add_percent',)
+
+    def __init__(self, label: str, values: Union[Mapping, pd.Series, pd.DataFrame] = None,
+                 folder: Union[str, Path] = 'config.snip_path', command: str = None,
+                 float_format: Union[str, Callable] = '%.3f', na_rep: str = '', sep: str = '_'):
+        self.command = label if command is None else command
+        if not _COMMAND_RE.match(self.command):
+            raise ValueError(f'LaTeX command names may only contain letters, set `command` instead of using '
+                             f'{self.command!r}')
+        self.float_format = float_format
+        self.na_rep = na_rep
+        self.sep = sep
+        self.values = {}
+        if values is not None:
+            self._set(values)
+        super().__init__(label, folder, obj_supplied=values is not None)
+
+    def _set(self, values) -> bool:
+        """Formats the given values and adds them; returns whether any value changed"""
+        values = _flatten(values, self.sep)
+        for key in values.index:
+            if not _KEY_RE.match(key):
+                raise ValueError(f'Invalid key {key!r}, keys may only contain letters, digits and _.:-')
+        formatted = format_values(values, self.float_format, self.na_rep)
+        changed = False
+        for key, value in zip(formatted.index, formatted):
+            value = _UNESCAPED_PERCENT_RE.sub('', value.replace('\n', ' '))
+            if self.values.get(key) != value:
+                self.values[key] = value
+                changed = True
+        return changed
+
+    def update(self, values: Union[Mapping, pd.Series, pd.DataFrame]) -> 'SnippetBank':
+        """Changes or adds the given values, and saves the file if any of them changed"""
+        if self._set(values) and config.auto_save:
+            self._auto_save()
+        return self
+
+    def __getitem__(self, key: str) -> str:
+        return self.values[key]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _repr_latex_(self):
+        return None  # the macro definitions are not useful in notebooks, see _repr_html_
+
+    def _repr_html_(self) -> str:
+        return pd.Series(self.values, dtype=object, name=self.label).to_frame()._repr_html_()
+
+    @property
+    def tex(self) -> str:
+        end = '%' if config.add_percent else ''
+        prefix = f'{self.label}@'
+        lines = [f'% \\{self.command}{{key}} prints the value saved as key (generated by texpro)',
+                 f'\\newcommand\\{self.command}[1]{{\\ifcsname {prefix}#1\\endcsname\\csname {prefix}#1\\endcsname'
+                 f'\\else\\textbf{{??\\detokenize{{#1}}}}\\fi}}{end}']
+        lines += [f'\\expandafter\\def\\csname {prefix}{key}\\endcsname{{{self.values[key]}}}{end}'
+                  for key in sorted(self.values)]
+        return '\n'.join(lines) + '\n'
+
+    _definition_re = re.compile(r'^\\expandafter\\def\\csname [^@]*@(\S+)\\endcsname\{(.*)\}%?$', re.M)
+
+    @timed_method('load')
+    def load(self) -> 'SnippetBank':
+        """Reads the saved values (none if the file does not exist yet)"""
+        try:
+            self.values = dict(self._definition_re.findall(load_cache.read_text(self.path)))
+        except FileNotFoundError:
+            self.values = {}
+        return self
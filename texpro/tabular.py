@@ -0,0 +1,136 @@
+"""A vectorized, streaming alternative to DataFrame.to_latex for very large tables"""
+
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .manifest import write_if_changed, write_stream_if_changed
+
+LATEX_ESCAPES = str.maketrans({
+    '\\': r'\textbackslash{}',
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+})
+
+
+def escape_latex(column: pd.Series) -> pd.Series:
+    """Escapes LaTeX special characters in a column of strings"""
+    return column.str.translate(LATEX_ESCAPES)
+
+
+def format_column(column: pd.Series, float_format: Union[str, Callable] = '%.3f', na_rep: str = '',
+                  escape: bool = True) -> pd.Series:
+    """Formats all values of a column as strings at once"""
+    isna = column.isna().to_numpy()
+    if column.dtype.kind == 'f' and isinstance(float_format, str):
+        values = np.char.mod(float_format, np.where(isna, 0., column.to_numpy(dtype=float)))
+        formatted = pd.Series(values, index=column.index, dtype=object)
+    elif column.dtype.kind == 'f':
+        formatted = column.map(float_format)
+    else:
+        formatted = column.astype(str)
+        if escape and column.dtype.kind not in 'iub':
+            formatted = escape_latex(formatted)
+    return formatted.where(~isna, na_rep)
+
+
+def _header(df: pd.DataFrame, escape: bool) -> str:
+    names = pd.Series([str(name) for name in df.columns], dtype=object)
+    if escape:
+        names = escape_latex(names)
+    return ' & '.join(names) + r' \\'
+
+
+def _prepare(df: pd.DataFrame, index: bool) -> pd.DataFrame:
+    if isinstance(df.columns, pd.MultiIndex):
+        raise NotImplementedError('Tables with MultiIndex columns are not supported, use DataFrame.to_latex')
+    if index:
+        # unnamed index levels get an empty header
+        names = ['' if name is None else name for name in df.index.names] + list(df.columns)
+        df = df.reset_index(drop=False)
+        df.columns = names
+    return df
+
+
+def _column_format(df: pd.DataFrame, index_levels: int) -> str:
+    """Index columns are left-aligned, numeric columns right-aligned (as in DataFrame.to_latex)"""
+    return 'l' * index_levels + ''.join('r' if df.iloc[:, i].dtype.kind in 'iuf' else 'l'
+                                        for i in range(index_levels, df.shape[1]))
+
+
+def tabular_rows(df: pd.DataFrame, chunk_size: int = 10000, float_format: Union[str, Callable] = '%.3f',
+                 na_rep: str = '', escape: bool = True) -> Iterator[str]:
+    """Yields the body rows of a table (`a & b \\\\`), formatting `chunk_size` rows at a time"""
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        cells = [format_column(chunk.iloc[:, i], float_format, na_rep, escape) for i in range(chunk.shape[1])]
+        if not cells:
+            continue
+        rows = cells[0].str.cat(cells[1:], sep=' & ') if len(cells) > 1 else cells[0]
+        yield '\n'.join(rows + r' \\') + '\n'
+
+
+def tabular_lines(df: pd.DataFrame, index: bool = True, column_format: str = None, longtable: bool = False,
+                  caption: str = None, label: str = None, continued: bool = False,
+                  **kwargs) -> Iterator[str]:
+    """Yields a complete tabular (or longtable) environment in chunks of text.
+
+    A longtable includes the caption and label (if given), since it cannot be placed inside a table float.
+    Keyword arguments are passed on to tabular_rows.
+    """
+    index_levels = df.index.nlevels if index else 0
+    df = _prepare(df, index)
+    escape = kwargs.get('escape', True)
+    environment = 'longtable' if longtable else 'tabular'
+    yield f'\\begin{{{environment}}}{{{column_format or _column_format(df, index_levels)}}}\n'
+    if longtable:
+        if caption is not None:
+            # continued parts keep the number of the first one
+            yield f'\\caption{{{caption}}}' if not continued \
+                else f'\\addtocounter{{table}}{{-1}}\\caption[]{{{caption} (continued)}}'
+            yield f'\\label{{{label}}}\\\\\n' if label and not continued else '\\\\\n'
+        header = _header(df, escape)
+        yield f'\\toprule\n{header}\n\\midrule\n\\endfirsthead\n'
+        yield f'\\toprule\n{header}\n\\midrule\n\\endhead\n'
+        yield '\\midrule\n\\multicolumn{%d}{r}{continued on next page}\\\\\n\\endfoot\n' % df.shape[1]
+        yield '\\bottomrule\n\\endlastfoot\n'
+    else:
+        yield f'\\toprule\n{_header(df, escape)}\n\\midrule\n'
+    yield from tabular_rows(df, **kwargs)
+    if not longtable:
+        yield '\\bottomrule\n'
+    yield f'\\end{{{environment}}}\n'
+
+
+def write_tabular(df: pd.DataFrame, path: Union[str, Path], rows_per_file: Optional[int] = None,
+                  input_folder: str = '', **kwargs) -> List[Path]:
+    """Streams a table into `path`.  With rows_per_file, the table is split into several longtables saved as
+    `<name>-<i>.tex`, and `path` only \\input-s them (from `input_folder`, relative to the main document).
+    Returns the written files.
+
+    Keyword arguments are passed on to tabular_lines.
+    """
+    path = Path(path)
+    if not rows_per_file or len(df) <= rows_per_file:
+        write_stream_if_changed(path, tabular_lines(df, **kwargs))
+        return [path]
+
+    kwargs['longtable'] = True
+    parts = []
+    for i, start in enumerate(range(0, len(df), rows_per_file)):
+        part = path.with_name(f'{path.stem}-{i + 1}{path.suffix}')
+        write_stream_if_changed(part, tabular_lines(df.iloc[start:start + rows_per_file], continued=i > 0,
+                                                    **kwargs))
+        parts.append(part)
+    input_folder = input_folder.rstrip('/') + '/' if input_folder else ''
+    write_if_changed(path, ''.join(f'\\input{{{input_folder}{part.stem}}}\n' for part in parts).encode())
+    return [path] + parts
@@ -0,0 +1,114 @@
+"""Saving assets to several documents at once (e.g. a paper, slides and a poster), each a doc_path with its own
+settings.  Each asset is rendered once per distinct value of the settings it depends on (Asset.render_settings,
+e.g. tab_template for tables), and the files are written to all targets concurrently."""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Tuple, Union
+
+from .manifest import get_manifest, record_skip
+from .registry import registry
+from .settings import config
+from .texassets import Asset, Plot, TexFigure
+
+Target = Union[str, Path, Mapping[str, object]]  # a doc_path, or settings of config (usually with a doc_path)
+
+
+def _settings(target: Target) -> dict:
+    if isinstance(target, Mapping):
+        return dict(target)
+    return {'doc_path': target}
+
+
+def _render_key(asset: Asset) -> str:
+    """The settings of the current config that the asset's content depends on: targets with the same key
+    render the same content"""
+    names = asset.render_settings
+    if names is None:
+        names = [field.name for field in fields(config) if field.name != 'doc_path']
+    return repr([config.save, *(getattr(config, name) for name in names)])
+
+
+def _expand(assets: Iterable[Asset]) -> List[Asset]:
+    """The assets, preceded by the images of TexFigures"""
+    expanded = []
+    for asset in assets:
+        if isinstance(asset, TexFigure):
+            # use label from figure also for image, if none set yet
+            if getattr(asset.figure, 'label', None) is None:
+                asset.figure.label = asset.label
+            expanded.append(asset.figure)
+        expanded.append(asset)
+    return list(dict.fromkeys(expanded))
+
+
+def _writes(asset: Asset, targets: List[Tuple[int, dict]]) -> List[Tuple[int, Callable[[], object]]]:
+    """Renders the asset with the current config and returns how to write it to each of the targets"""
+    if not config.save:
+        return []
+    fingerprint = None
+    if isinstance(asset, Plot):
+        # like Plot.save, skip the targets that already hold this figure
+        fingerprint = asset.fingerprint()
+        pending = []
+        for index, settings in targets:
+            with config.override(**settings):
+                manifest = get_manifest()
+                if fingerprint is not None and manifest is not None \
+                        and manifest.has_fingerprint(asset.path, fingerprint):
+                    record_skip(asset.path)
+                else:
+                    pending.append((index, settings))
+        targets = pending
+        if not targets:
+            return []
+    data = asset._render()
+    if data is None:
+        return [(index, asset.save) for index, _ in targets]
+    if isinstance(asset, Plot):
+        return [(index, partial(asset._save_rendered, data, fingerprint)) for index, _ in targets]
+    return [(index, partial(asset._write, data)) for index, _ in targets]
+
+
+def _run(asset: Asset, settings: dict, write: Callable[[], object]):
+    with config.override(**settings):
+        asset.path.parent.mkdir(parents=True, exist_ok=True)
+        registry.register(asset)
+        write()
+
+
+def save_to(assets: Iterable[Asset], targets: Iterable[Target],
+            workers: int = None) -> Dict[Tuple[Asset, int], BaseException]:
+    """Saves every asset to every target, e.g. `save_to(assets, ['paper', {'doc_path': 'slides', 'tab_template':
+    SLIDES_TEMPLATE}])`.  A target is a doc_path or a dict of config settings.
+
+    Each asset is rendered once per distinct value of its render_settings among the targets, and the files are
+    written in up to `workers` threads (default: config.save_workers).  Returns the assets that could not be
+    saved to a target, as (asset, index of the target), mapped to their errors.
+    """
+    targets = [_settings(target) for target in targets]
+    errors = {}
+    writes = []
+    for asset in _expand(assets):
+        groups: Dict[str, List[Tuple[int, dict]]] = {}
+        for index, settings in enumerate(targets):
+            with config.override(**settings):
+                groups.setdefault(_render_key(asset), []).append((index, settings))
+        for group in groups.values():
+            with config.override(**group[0][1]):
+                try:
+                    writes.extend((asset, index, write) for index, write in _writes(asset, group))
+                except Exception as e:
+                    errors.update({(asset, index): e for index, _ in group})
+
+    with ThreadPoolExecutor(max_workers=workers or config.save_workers, thread_name_prefix='texpro-target') as pool:
+        # with the config overrides of the caller
+        futures = {(asset, index): pool.submit(contextvars.copy_context().run, _run, asset, targets[index], write)
+                   for asset, index, write in writes}
+    for key, future in futures.items():
+        if future.exception() is not None:
+            errors[key] = future.exception()
+    return errors
@@ -1,34 +1,54 @@
 from __future__ import annotations
 
-__all__ = ['TexSnippet', 'TexEquation', 'TexTable', 'StargazerTable', 'TexFigure', 'Image', 'Plot']
+__all__ = ['TexSnippet', 'TexEquation', 'TexTable', 'StargazerTable', 'TexFigure', 'Plot']
 
+import hashlib
 import io
+import logging
+import sys
 from abc import ABC, abstractmethod
 from pathlib import Path
 from textwrap import indent
-from typing import Union
-
-import IPython
+from typing import List, Optional, Tuple, Union
 
+from .background import SaveError, save_queue
+from .batch import active_batch
+from .cache import df_fingerprint, load_cache, obj_fingerprint, render_cache
+from .manifest import get_manifest, log_asset, record_skip, write_if_changed, write_stream_if_changed
+from .registry import registry
 from .settings import config
+from .timing import timed, timed_method
+
+logger = logging.getLogger(__name__)
 
 
 class Asset(ABC):
     label: str
     folder: Path
+    stores_objects: bool = False  # whether saved files are deduplicated with config.object_store
+    render_settings: Optional[Tuple[str, ...]] = None  # settings the saved content depends on (None: any)
 
+    @timed_method('init')
     def __init__(self, label: str, folder: Union[str, Path],
-                 obj_supplied: bool = None):
+                 obj_supplied: bool = None, register: bool = True):
+        """register=False if the subclass can only register the asset (see registry) once it is initialised"""
         self.label = label
         folder = config.get_or_return(folder)
         if not isinstance(folder, Path):
             folder = Path(folder)
         self.folder = folder
+        if register:
+            registry.register(self)
 
         # auto save/load
         if obj_supplied is not None:
             if obj_supplied and config.auto_save:
-                self.save()
+                if active_batch() is not None:
+                    active_batch().add(self)
+                elif config.async_save:
+                    save_queue.submit(self)
+                else:
+                    self._auto_save()
             elif not obj_supplied and config.auto_load:
                 self.load()
 
@@ -44,7 +64,15 @@ class Asset(ABC):
 
     @property
     def path(self) -> Path:
-        return config.abspath(self.rel_path)
+        # cached, as it is needed for registering, timing and writing the asset
+        doc_path = config.doc_path
+        key = (doc_path, self.folder, self.file_name)
+        cached = vars(self).get('_path')
+        if cached is not None and cached[0] == key and doc_path is not None and doc_path.is_absolute():
+            return cached[1]
+        path = config.abspath(self.rel_path)
+        self._path = (key, path)
+        return path
 
     @staticmethod
     def _can_save(obj) -> bool:
@@ -59,6 +87,44 @@ class Asset(ABC):
     def save(self) -> Asset:
         pass
 
+    def _render(self) -> Optional[bytes]:
+        """What save() writes, rendered with the current config (None if save() has to be called instead)"""
+        return None
+
+    def save_to(self, *targets, workers: int = None) -> Asset:
+        """Saves the asset to several documents, each a doc_path or a dict of config settings, rendering it
+        once per distinct combination of settings (see texpro.targets)"""
+        from .targets import save_to
+        errors = list(save_to([self], targets, workers).values())
+        if len(errors) == 1:
+            raise errors[0]
+        elif errors:
+            raise SaveError([(self, e) for e in errors]) from errors[0]
+        return self
+
+    def _auto_save(self):
+        if config.targets:
+            self.save_to(*config.targets)
+        else:
+            self.save()
+
+    @timed_method('write')
+    def _write(self, data: bytes) -> bool:
+        """Writes data to self.path if it differs from the last saved version; returns whether it was written"""
+        if config.object_store and self.stores_objects:
+            from .objects import write_object_if_changed
+            return write_object_if_changed(self.path, data)
+        return write_if_changed(self.path, data)
+
+    def is_current(self) -> bool:
+        """Whether the saved file is known to be up to date, without rendering it again"""
+        return False
+
+    def save_if_changed(self) -> Asset:
+        if not self.is_current():
+            self.save()
+        return self
+
     def load(self) -> Asset:
         raise NotImplementedError(f'{type(self)} can currently only be saved.')
 
@@ -78,20 +144,27 @@ class TexAsset(Asset, ABC):
         return self.tex
 
     def save(self) -> Asset:
-        if not self._can_save(self.tex_output):
+        tex_output = self.tex_output
+        if not self._can_save(tex_output):
             return
-        self.path.write_text(self.tex_output)
+        self._write(tex_output.encode())
         return self
 
+    def _render(self) -> Optional[bytes]:
+        tex_output = self.tex_output
+        return tex_output.encode() if self._can_save(tex_output) else None
+
 
 class TexSnippet(TexAsset):
     tex: str
+    render_settings = ('add_percent',)
 
     def __init__(self, label: str, tex: str = None, folder: Union[str, Path] = 'config.snip_path'):
         self.tex = tex
         super().__init__(label, folder, obj_supplied=tex is not None)
 
     @property
+    @timed_method('render')
     def tex_output(self) -> str:
         if config.add_percent and \
                 (not self.tex[-1] == '%' or self.tex[-2] == r'\%'):
@@ -99,13 +172,15 @@ class TexSnippet(TexAsset):
         else:
             return self.tex
 
+    @timed_method('load')
     def load(self) -> Asset:
-        self.tex = self.path.read_text()
+        self.tex = load_cache.read_text(self.path)
 
 
 class TexEquation(TexAsset):
     block: str
     eq: str
+    render_settings = ('eq_prefix', 'eq_template')
 
     def __init__(self, label: str, eq: str, folder: Union[str, Path] = 'config.eq_path',
                  block: str = 'equation'):
@@ -122,6 +197,7 @@ class TexEquation(TexAsset):
         return f'${self.eq}$'
 
     @property
+    @timed_method('render')
     def tex_output(self) -> str:
         return config.eq_template.format(
             label=self.tex_label,
@@ -131,37 +207,111 @@ class TexEquation(TexAsset):
 
 
 class TexTable(TexAsset):
+    render_settings = ('tab_prefix', 'tab_template')
+
     def __init__(self, label: str, df, folder: Union[str, Path] = 'config.tab_path',
                  caption: str = '', formatting: str = 'config.tab_formatting',
-                 to_latex_args: dict = {}):
+                 to_latex_args: dict = {}, engine: str = 'config.tab_engine', tabular_args: dict = {}):
+        """Use engine='native' for very large tables: they are then formatted by texpro.tabular and streamed
+        to the file.  tabular_args are passed to texpro.tabular.tabular_lines, e.g. longtable=True, and may
+        include rows_per_file to split the table into several files."""
         self.df = df
         self.caption = caption
         self.formatting = config.get_or_return(formatting)
         self.to_latex_args = to_latex_args
+        self.engine = config.get_or_return(engine)
+        self.tabular_args = tabular_args
         super().__init__(label, folder, obj_supplied=True)
 
     def _repr_html_(self):
-        return self.df.to_html()
+        # bounded, as notebooks store the html (the saved tex is complete)
+        from .preview import table_html
+
+        fingerprint = df_fingerprint(self.df)
+        key = None if fingerprint is None else (
+            'TexTable.html', fingerprint, config.html_max_rows, config.html_max_columns, config.html_max_bytes)
+        return render_cache.get(key, lambda: table_html(self.df))
+
+    def _repr_latex_(self):
+        from .preview import table_latex
+
+        return table_latex(lambda: self.tex, *self.df.shape)
 
     @property
     def tex_label(self) -> str:
         return config.tab_prefix + self.label
 
     @property
+    def _render_key(self):
+        fingerprint = df_fingerprint(self.df)
+        if fingerprint is None:
+            return None
+        return ('TexTable', fingerprint, repr(sorted(self.to_latex_args.items())), self.caption,
+                self.formatting, self.tex_label, config.tab_template,
+                self.engine, repr(sorted(self.tabular_args.items())))
+
+    @property
+    @timed_method('render')
     def tex(self):
-        return config.tab_template.format(
+        if self.engine == 'native':
+            return render_cache.get(self._render_key, lambda: ''.join(self._tex_chunks()))
+        return render_cache.get(self._render_key, lambda: config.tab_template.format(
             formatting=self.formatting,
             table=self.df.to_latex(**self.to_latex_args),
             caption=self.caption,
             label=self.tex_label
-        )
+        ))
+
+    def _tex_chunks(self):
+        """The tex output of the native engine, piece by piece"""
+        from .tabular import tabular_lines
+
+        args = {key: value for key, value in self.tabular_args.items() if key != 'rows_per_file'}
+        if args.get('longtable'):
+            # a longtable cannot be placed inside the table template
+            yield from tabular_lines(self.df, caption=self.caption, label=self.tex_label, **args)
+            return
+        mark = '\0TABLE\0'
+        prefix, suffix = config.tab_template.format(
+            formatting=self.formatting,
+            table=mark,
+            caption=self.caption,
+            label=self.tex_label
+        ).split(mark)
+        yield prefix
+        yield from tabular_lines(self.df, **args)
+        yield suffix
+
+    @property
+    def _split(self) -> bool:
+        """Whether save() writes the table to several files (see write_tabular)"""
+        rows_per_file = self.tabular_args.get('rows_per_file')
+        return self.engine == 'native' and bool(rows_per_file) and len(self.df) > rows_per_file
+
+    def _render(self) -> Optional[bytes]:
+        if self._split:
+            return None  # written to several files by save()
+        return super()._render()
 
     def save(self) -> Asset:
-        super().save()  # save tex
+        if self.engine != 'native':
+            super().save()  # save tex
+            return self
+        if not self._can_save(self.df):
+            return
+        with timed(self, 'write'):  # the table is rendered while it is written
+            if self._split:
+                from .tabular import write_tabular
+                write_tabular(self.df, self.path, input_folder=self.folder.as_posix(),
+                              caption=self.caption, label=self.tex_label, **self.tabular_args)
+            else:
+                write_stream_if_changed(self.path, self._tex_chunks())
         return self
 
 
 class StargazerTable(TexAsset):
+    render_settings = ('tab_prefix', 'tab_template')
+
     def __init__(self, label: str, stargazer, folder: Union[str, Path] = 'config.tab_path',
                  caption: str = '', use_template: bool = True,
                  formatting: str = 'config.tab_formatting'):
@@ -172,14 +322,32 @@ class StargazerTable(TexAsset):
         super().__init__(label, folder, obj_supplied=True)
 
     def _repr_html_(self):
-        return self.stargazer.render_html()
+        from .preview import stargazer_html
+
+        key = ('StargazerTable.html', obj_fingerprint(self.stargazer), config.html_max_rows,
+               config.html_max_columns, config.html_max_bytes)
+        return render_cache.get(key, lambda: stargazer_html(self.stargazer))
+
+    def _repr_latex_(self):
+        from .preview import table_latex
+
+        return table_latex(lambda: self.tex, len(self.stargazer.cov_names), self.stargazer.num_models)
 
     @property
     def tex_label(self) -> str:
         return config.tab_prefix + self.label
 
     @property
+    def _render_key(self):
+        return ('StargazerTable', obj_fingerprint(self.stargazer), self.use_template, self.caption,
+                self.formatting, self.tex_label, config.tab_template)
+
+    @property
+    @timed_method('render')
     def tex(self) -> str:
+        return render_cache.get(self._render_key, self._render_tex)
+
+    def _render_tex(self) -> str:
         orig_tex: str = self.stargazer.render_latex()
         if self.use_template:
             # remove the first three and last line from the stargazer output
@@ -198,67 +366,96 @@ class StargazerTable(TexAsset):
         return tex
 
 
-class Image(Asset, IPython.display.Image):
-    orig_format: str = None
-
-    def __init__(self, label: str = None, folder: Union[str, Path] = 'config.img_path',
-                 url: str = None, data: object = None, pil: object = None, format: str = 'png',
-                 **kwargs):
-        """Currently supports png, jpg and gif.  There are four ways to create an Image.
-
-        To load an image from the web, specify the url.  The format is automatically inferred.  For example,
-            >>> Image('test', url='http://test.org/monkey.png', folder=Path('./img'))
-        will download http://test.org/monkey.png and save it to img/test.png.
-
-        To load an image from a byte variable, use data.  The format is automatically inferred.  For example,
-            >>> Image('test', data=img_data, folder=Path('./img'))
-        will save img_data to img/test.png.
-
-        To load a pillow/PIL image, specify pil and format.  For example,
-            >>> pil_img = PIL.Image.new('RGB', (10, 10), color = 'red')
-            >>> Image('test', pil=pil_img, format='png', folder=Path('./img'))
-        will save pil_img to img/test.png.
-
-        To load an image from a file, specify the label and format.  For example,
-            >>> Image('test', format='png', folder=Path('./img'))
-        will load the file img/test.png.
-        """
-        # initialise label and folder
-        Asset.__init__(self, label, folder)
-
-        # initialise image
-        if url:
-            # use embed=True to ensure image is downloaded
-            IPython.display.Image.__init__(self, url=url, embed=True, **kwargs)
-        elif data or pil:
-            if pil:
-                # convert PIL/pillow image into compressed image data
-                data_io = io.BytesIO()
-                pil.save(data_io, format=format)
-                data = data_io.getvalue()
-            IPython.display.Image.__init__(self, data=data, **kwargs)
-        elif label and format:
-            # save format -> always used for self.file_name instead of inferred format
-            self.orig_format = format
-            IPython.display.Image.__init__(self, filename=self.path, **kwargs)
-        else:
-            raise SyntaxError('No image provided. Expecting url, data, pil or label and format.')
-
-    @property
-    def extension(self) -> str:
-        return self.orig_format or self.format
-
-    @property
-    def file_name(self) -> str:
-        return f'{self.label}.{self.extension}'
-
-    def save(self) -> Asset:
-        with open(self.path, 'wb') as file:
-            file.write(self.data)
-
-    def load(self) -> Asset:
-        self.reload()
-        return self
+DETERMINISTIC_METADATA = {
+    'pdf': {'CreationDate': None},
+    'svg': {'Date': None},
+}
+
+
+VECTOR_FORMATS = ('pdf', 'svg', 'eps', 'ps')
+
+
+def _element_count(artist) -> int:
+    from matplotlib.lines import Line2D
+
+    if isinstance(artist, Line2D):
+        return len(artist.get_xydata())
+    count = len(artist.get_offsets())
+    array = artist.get_array()
+    if array is not None:
+        count = max(count, array.size)  # e.g. the cells of a pcolormesh
+    return count if count > 1 else len(artist.get_paths())
+
+
+def heavy_artists(figure, threshold: int) -> List[Tuple[object, int]]:
+    """Collections (e.g. scatter plots) and lines of a matplotlib figure with more than `threshold` points,
+    and their number of points"""
+    from matplotlib.collections import Collection
+    from matplotlib.lines import Line2D
+
+    figure = getattr(figure, 'figure', figure)  # e.g. seaborn grids
+    found = []
+    for artist in figure.findobj(lambda artist: isinstance(artist, (Collection, Line2D))):
+        if not artist.get_rasterized():
+            count = _element_count(artist)
+            if count > threshold:
+                found.append((artist, count))
+    return found
+
+
+def render_plot(plot, format: str, savefig_args: dict, write_image_args: dict,
+                rasterize: Optional[Tuple[int, int]] = None) -> Optional[bytes]:
+    """Renders a plot into bytes, or returns None if it only has a write_image method.
+
+    With rasterize=(threshold, dpi), heavy artists (see heavy_artists) of matplotlib plots are rasterized at
+    this dpi in vector formats, while axes and text stay vector graphics."""
+    if callable(getattr(plot, 'savefig', None)):
+        # render matplotlib plots using savefig
+        artists = []
+        if rasterize is not None and format in VECTOR_FORMATS:
+            artists = [artist for artist, _ in heavy_artists(plot, rasterize[0])]
+            if artists:
+                savefig_args = dict(savefig_args)
+                savefig_args.setdefault('dpi', rasterize[1])
+        buffer = io.BytesIO()
+        try:
+            for artist in artists:
+                artist.set_rasterized(True)
+            plot.savefig(buffer, format=format, **savefig_args)
+        finally:
+            for artist in artists:  # leave the figure as it was
+                artist.set_rasterized(False)
+        return buffer.getvalue()
+    elif callable(getattr(plot, 'to_image', None)):
+        # render plotly plots using to_image (https://plot.ly/python/static-image-export/)
+        return plot.to_image(format=format, **write_image_args)
+    elif callable(getattr(plot, 'write_image', None)):
+        return None
+    else:
+        raise TypeError('Plot could not be saved: it has neither a savefig (matplotlib-like) '
+                        'nor a write_image (plotly-like) method.')
+
+
+def figure_fingerprint(figure, *extra) -> Optional[str]:
+    """Hash of a matplotlib figure's pixels, drawn to an Agg canvas, and `extra` (None if not matplotlib)"""
+    if 'matplotlib' not in sys.modules:
+        return None
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = getattr(figure, 'figure', figure)  # e.g. seaborn grids
+    if not isinstance(figure, Figure):
+        return None
+    canvas = figure.canvas
+    agg_canvas = canvas if isinstance(canvas, FigureCanvasAgg) else FigureCanvasAgg(figure)
+    try:
+        agg_canvas.draw()
+        h = hashlib.sha256(agg_canvas.buffer_rgba())  # hashes the buffer without copying it
+    finally:
+        if agg_canvas is not canvas:
+            figure.set_canvas(canvas)
+    h.update(repr((figure.dpi, extra)).encode())
+    return h.hexdigest()
 
 
 class Plot(Asset):
@@ -266,34 +463,130 @@ class Plot(Asset):
     plot: object
     format: str
     savefig_args: dict
+    render_skipped: bool = None  # whether the last save was skipped, because the figure was unchanged
+    stores_objects = True
+    render_settings = ('skip_unchanged',)  # which adds deterministic metadata
 
     def __init__(self, plot, label: str = None, folder: Union[str, Path] = 'config.img_path',
                  format: str = 'pdf', savefig_args: dict = {'bbox_inches': 'tight'},
-                 write_image_args: dict = {}):
+                 write_image_args: dict = {}, rasterize: int = 'config.rasterize_threshold',
+                 rasterize_dpi: int = 'config.rasterize_dpi'):
+        """With rasterize (a number of points), collections and lines with more points are rasterized at
+        rasterize_dpi when saving matplotlib plots as vector graphics, e.g. scatter plots with millions of
+        points (see heavy_artists).  Axes, text and labels stay vector graphics."""
         self.plot = plot
         self.format = format
         self.savefig_args = savefig_args
         self.write_image_args = write_image_args
+        self.rasterize = config.get_or_return(rasterize)
+        self.rasterize_dpi = config.get_or_return(rasterize_dpi)
         super().__init__(label, folder)
 
     def _ipython_display_(self):
         if callable(getattr(self.plot, '_ipython_display_', None)):
             return self.plot._ipython_display_()
+        if config.preview and callable(getattr(self.plot, 'savefig', None)):
+            # render a small png here (figures are not thread-safe), downscale and encode it in the background
+            from .preview import display_preview
+            args = {key: value for key, value in self.savefig_args.items() if key not in ('dpi', 'metadata')}
+            buffer = io.BytesIO()
+            self.plot.savefig(buffer, format='png', dpi=config.preview_dpi, **args)
+            display_preview(buffer.getvalue)
 
     @property
     def file_name(self) -> str:
         return f'{self.label}.{self.format}'
 
+    @property
+    def _savefig_args(self) -> dict:
+        args = dict(self.savefig_args)
+        if config.skip_unchanged and self.format in DETERMINISTIC_METADATA:
+            # drop creation dates, so unchanged plots produce identical bytes
+            args.setdefault('metadata', DETERMINISTIC_METADATA[self.format])
+        return args
+
+    @property
+    def _rasterize_args(self) -> Optional[Tuple[int, int]]:
+        return (self.rasterize, self.rasterize_dpi) if self.rasterize is not None else None
+
+    @property
+    def render_args(self) -> tuple:
+        """Arguments of render_plot(), resolved against the current config"""
+        return self.plot, self.format, self._savefig_args, self.write_image_args, self._rasterize_args
+
+    @timed_method('render')
+    def render(self) -> Optional[bytes]:
+        """The saved file's content, or None if the plot can only be written to a file directly"""
+        return render_plot(*self.render_args)
+
+    @timed_method('fingerprint')
+    def fingerprint(self) -> Optional[str]:
+        """Hash of the figure's pixels, format and savefig arguments, to detect unchanged matplotlib figures
+        without rendering them as vector graphics"""
+        if not config.skip_unchanged:
+            return None
+        return figure_fingerprint(self.plot, self.format, sorted(self._savefig_args.items(), key=str),
+                                  self._rasterize_args)
+
+    def is_current(self) -> bool:
+        manifest = get_manifest()
+        fingerprint = self.fingerprint()
+        return manifest is not None and fingerprint is not None and manifest.has_fingerprint(self.path, fingerprint)
+
+    def _check_current(self) -> Optional[str]:
+        """Sets render_skipped (and counts the skip); returns the fingerprint to store once saved"""
+        manifest = get_manifest()
+        fingerprint = self.fingerprint() if manifest is not None else None
+        self.render_skipped = fingerprint is not None and manifest.has_fingerprint(self.path, fingerprint)
+        if self.render_skipped:
+            record_skip(self.path)
+        return fingerprint
+
+    def _save_rendered(self, data: bytes, fingerprint: Optional[str]):
+        rasterized = self._rasterized()
+        if rasterized:
+            self._log_rasterized(rasterized, len(data))
+        self._write(data)
+        manifest = get_manifest()
+        if manifest is not None and (fingerprint is not None or rasterized):
+            manifest.annotate(self.path, fingerprint=fingerprint, rasterized=bool(rasterized))
+
+    def _rasterized(self) -> List[Tuple[object, int]]:
+        """The artists that render() rasterizes"""
+        if self.rasterize is None or self.format not in VECTOR_FORMATS or 'matplotlib' not in sys.modules \
+                or not callable(getattr(self.plot, 'savefig', None)):
+            return []
+        return heavy_artists(self.plot, self.rasterize)
+
+    def _log_rasterized(self, rasterized: List[Tuple[object, int]], size: int):
+        message = (f'{self.label}: rasterized {len(rasterized)} artists with {sum(n for _, n in rasterized):,} '
+                   f'points at {self.rasterize_dpi} dpi, {size / 1e6:.2f} MB')
+        # the size reduction is known if the file was last saved without rasterizing
+        manifest = get_manifest()
+        entry = manifest.entries.get(manifest.key(self.path)) if manifest is not None else None
+        if entry is not None and not entry.get('rasterized') and self.path.exists():
+            previous = self.path.stat().st_size
+            message += f' instead of {previous / 1e6:.2f} MB ({1 - size / previous:.0%} smaller)'
+        logger.info(message)
+
+    def _render(self) -> Optional[bytes]:
+        return self.render()
+
+    def save_if_changed(self) -> Asset:
+        return self.save()  # save() already skips unchanged figures
+
     def save(self) -> Asset:
-        if callable(getattr(self.plot, 'savefig', None)):
-            # save matplotlib plots using savefig
-            self.plot.savefig(self.path, **self.savefig_args)
-        elif callable(getattr(self.plot, 'write_image', None)):
-            # save plotly plots using write_image (https://plot.ly/python/static-image-export/)
-            self.plot.write_image(str(self.path), **self.write_image_args)
+        fingerprint = self._check_current()
+        if self.render_skipped:
+            return self
+        data = self.render()
+        if data is not None:
+            self._save_rendered(data, fingerprint)
         else:
-            raise TypeError('Plot could not be saved: it has neither a savefig (matplotlib-like) '
-                            'nor a write_image (plotly-like) method.')
+            # save plotly plots using write_image (https://plot.ly/python/static-image-export/)
+            with timed(self, 'write'):
+                self.plot.write_image(str(self.path), **self.write_image_args)
+            log_asset(self.path)
         return self
 
     def load(self) -> Asset:
@@ -305,6 +598,7 @@ class TexFigure(TexAsset):
     figure: Asset
     caption: str
     incl_args: str
+    render_settings = ('fig_prefix', 'fig_template')
 
     def __init__(self, label: str, figure: Asset, folder: Union[str, Path] = 'config.fig_path',
                  caption: str = '', incl_args: str = r'width=.9\linewidth'):
@@ -314,13 +608,15 @@ class TexFigure(TexAsset):
         super().__init__(label, folder, obj_supplied=True)
 
     def _ipython_display_(self):
-        IPython.display.display(self.figure)
+        from IPython.display import display
+        display(self.figure)
 
     @property
     def tex_label(self) -> str:
         return config.fig_prefix + self.label
 
     @property
+    @timed_method('render')
     def tex(self):
         return config.fig_template.format(
             label=self.tex_label,
@@ -336,6 +632,15 @@ class TexFigure(TexAsset):
         # use label from figure also for image, if none set yet
         if not hasattr(self.figure, 'label') or self.figure.label is None:
             self.figure.label = self.label
-        self.figure.save()  # save image
+            registry.register(self.figure)
+        self.figure.save_if_changed()  # save image
         super().save()  # save tex
         return self
+
+
+def __getattr__(name):
+    # Image subclasses IPython.display.Image, so it (and IPython) is only imported when first used
+    if name == 'Image':
+        from .image import Image
+        return Image
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
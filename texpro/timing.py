@@ -0,0 +1,186 @@
+"""Time spent rendering, writing and loading each asset, see texpro.stats()"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from .settings import config
+
+PROFILE_VARIABLE = 'TEXPRO_PROFILE'  # '1' prints stats() at exit, a .json or .csv file name saves them
+
+PHASES = ('init', 'render', 'fingerprint', 'write', 'load')
+
+_lock = threading.Lock()
+_local = threading.local()
+_rows: Dict[tuple, dict] = {}
+_generation = 0  # increased by reset_stats, so that assets look up their rows again
+_hooks: List[Callable[[dict], None]] = []
+
+
+def _stack() -> list:
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def _row(asset) -> dict:
+    # the row is looked up once per asset (and document), as computing its path takes a while
+    rows = vars(asset).setdefault('_timing_rows', {})
+    key = (_generation, getattr(asset, 'label', None), config.doc_path)
+    row = rows.get(key)
+    if row is not None:
+        return row
+    try:
+        path = str(asset.path)
+    except Exception:
+        path = None  # e.g. no doc_path or label yet
+    row_key = (type(asset).__name__, key[1], path)
+    row = _rows.get(row_key)
+    if row is None:
+        row = dict(type=row_key[0], label=row_key[1], path=path)
+        for phase in PHASES:
+            row[f'{phase}_seconds'] = 0.
+            row[f'{phase}_calls'] = 0
+        row.update(bytes_written=0, bytes_skipped=0, cache_hits=0, cache_misses=0)
+        _rows[row_key] = row
+    rows[key] = row
+    return row
+
+
+@contextmanager
+def timed(asset, phase: str):
+    """Records the time spent on one phase (e.g. 'render') of an asset, including nested phases"""
+    stack = _stack()
+    if not config.timing or (stack and stack[-1]['asset'] is asset and stack[-1]['phase'] == phase):
+        yield  # disabled, or e.g. a subclass calling super().save()
+        return
+    event = {'asset': asset, 'phase': phase}
+    stack.append(event)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        event['seconds'] = time.perf_counter() - start
+        stack.pop()
+        _record(event)
+
+
+def timed_method(phase: str):
+    """Decorates a method (or property getter) of an asset, see timed()"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with timed(self, phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def note(**fields):
+    """Adds bytes_written, bytes_skipped or cache ('hit'/'miss') to the innermost timed phase of this thread"""
+    stack = _stack()
+    if stack:
+        event = stack[-1]
+        for key, value in fields.items():
+            event[key] = event.get(key, 0) + value if isinstance(value, int) else value
+
+
+def _record(event: dict):
+    asset = event.pop('asset')
+    phase = event['phase']
+    with _lock:
+        row = _row(asset)
+        row[f'{phase}_seconds'] = row.get(f'{phase}_seconds', 0.) + event['seconds']
+        row[f'{phase}_calls'] = row.get(f'{phase}_calls', 0) + 1
+        row['bytes_written'] += event.get('bytes_written', 0)
+        row['bytes_skipped'] += event.get('bytes_skipped', 0)
+        if 'cache' in event:
+            row['cache_hits' if event['cache'] == 'hit' else 'cache_misses'] += 1
+        hooks = list(_hooks)
+    if hooks:
+        event.update(type=row['type'], label=row['label'], path=row['path'])
+        for hook in hooks:
+            hook(event)
+
+
+def stats(by: str = 'asset') -> List[dict]:
+    """Time (in seconds), calls, bytes and render cache use per asset (or, with by='type', per asset type),
+    slowest first.  Use pandas.DataFrame(texpro.stats()) to view them as a table.
+
+    `init` is the time spent creating an asset, including its auto save (and thus its other phases).
+    """
+    with _lock:
+        rows = [dict(row) for row in _rows.values()]
+    if by == 'type':
+        totals = {}
+        for row in rows:
+            total = totals.setdefault(row['type'], {'type': row['type'], 'assets': 0})
+            total['assets'] += 1
+            for key, value in row.items():
+                if key not in ('type', 'label', 'path'):
+                    total[key] = total.get(key, 0) + value
+        rows = list(totals.values())
+    elif by != 'asset':
+        raise ValueError(f"by has to be 'asset' or 'type', not {by!r}")
+    # init includes the other phases if the asset was auto saved, so it is not added to them
+    return sorted(rows, key=lambda row: -sum(row[f'{phase}_seconds'] for phase in PHASES if phase != 'init'))
+
+
+def reset_stats():
+    global _generation
+    with _lock:
+        _rows.clear()
+        _generation += 1
+
+
+def add_hook(hook: Callable[[dict], None]):
+    """Calls hook(event) after each timed phase.  The event has the keys type, label, path, phase and seconds,
+    plus bytes_written, bytes_skipped or cache if they apply."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[dict], None]):
+    _hooks.remove(hook)
+
+
+def format_stats(rows: List[dict]) -> str:
+    """A plain text table of stats()"""
+    lines = [f'{"asset":40} {"init":>8} {"render":>8} {"write":>8} {"load":>8} {"written":>10} cache']
+    for row in rows:
+        name = row.get('label') or ''
+        name = f'{row["type"]} {name}'[:40]
+        lines.append(f'{name:40} {row["init_seconds"]:8.3f} {row["render_seconds"]:8.3f} '
+                     f'{row["write_seconds"]:8.3f} {row["load_seconds"]:8.3f} {row["bytes_written"]:10} '
+                     f'{row["cache_hits"]}/{row["cache_hits"] + row["cache_misses"]}')
+    return '\n'.join(lines)
+
+
+def dump_profile(target: str = None):
+    """Prints stats() to stderr, or saves them into a .json or .csv file (default: $TEXPRO_PROFILE)"""
+    target = target or os.environ.get(PROFILE_VARIABLE)
+    if not target:
+        return
+    rows = stats()
+    if target.endswith('.json'):
+        with open(target, 'w') as file:
+            json.dump(rows, file, indent=1)
+    elif target.endswith('.csv'):
+        import csv
+        with open(target, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]) if rows else ['type'])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        print(format_stats(rows), file=sys.stderr)
+
+
+if os.environ.get(PROFILE_VARIABLE):
+    atexit.register(dump_profile)
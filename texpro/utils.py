@@ -1,7 +1,8 @@
 import os
-import subprocess
 from contextlib import contextmanager
+from fnmatch import fnmatch
 from pathlib import Path
+from typing import Dict, Iterable, List
 from warnings import warn
 
 
@@ -24,21 +25,129 @@ tee =    '├── '
 last =   '└── '
 
 
-def tree(dir_path: Path, prefix: str=''):
+def excluded(entry: os.DirEntry, exclude) -> bool:
+    """Whether the entry matches any of the glob patterns in exclude: by name, or by absolute path for patterns
+    that are absolute paths"""
+    for pattern in exclude:
+        if os.path.isabs(pattern):
+            if fnmatch(os.path.abspath(entry.path), pattern):
+                return True
+        elif fnmatch(entry.name, pattern):
+            return True
+    return False
+
+
+def _scan(dir_path, exclude) -> List[os.DirEntry]:
+    """Sorted entries of a directory, leaving out those matching any of the patterns in exclude (see excluded)"""
+    try:
+        with os.scandir(dir_path) as entries:
+            return sorted((entry for entry in entries if not excluded(entry, exclude)), key=lambda entry: entry.name)
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def _is_dir(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir()  # uses the type from scandir, without another stat call
+    except OSError:
+        return False
+
+
+def _size(entry: os.DirEntry) -> int:
+    try:
+        return entry.stat().st_size
+    except OSError:
+        return 0
+
+
+def tree_summary(entries: Iterable[os.DirEntry], exclude=()) -> Dict[str, Dict[str, int]]:
+    """Number of files and total bytes by file type (suffix), including subdirectories"""
+    summary = {}
+    stack = list(entries)
+    while stack:
+        entry = stack.pop()
+        if _is_dir(entry):
+            stack.extend(_scan(entry.path, exclude))
+            continue
+        suffix = os.path.splitext(entry.name)[1].lstrip('.').lower() or '(none)'
+        counts = summary.setdefault(suffix, {'files': 0, 'bytes': 0})
+        counts['files'] += 1
+        counts['bytes'] += _size(entry)
+    return dict(sorted(summary.items(), key=lambda item: -item[1]['files']))
+
+
+def format_size(n_bytes: int) -> str:
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if n_bytes < 1000 or unit == 'GB':
+            return f'{n_bytes:.0f} {unit}' if unit == 'B' else f'{n_bytes:.1f} {unit}'
+        n_bytes /= 1000
+
+
+def format_summary(summary: Dict[str, Dict[str, int]]) -> str:
+    """E.g. `png: 1204 files, 30.2 MB; pdf: 3 files, 1.1 MB`"""
+    return '; '.join(f'{suffix}: {counts["files"]} file{"s" if counts["files"] != 1 else ""}, '
+                     f'{format_size(counts["bytes"])}' for suffix, counts in summary.items())
+
+
+def tree(dir_path: Path, prefix: str='', exclude=(), max_depth: int = None, max_entries: int = None,
+         summary: bool = True):
     """A recursive generator, given a directory Path object
     will yield a visual tree structure line by line
-    with each line prefixed by the same characters
+    with each line prefixed by the same characters,
+    leaving out the entries matching the glob patterns in exclude (see excluded)
     (based on https://stackoverflow.com/a/59109706)
+
+    Directories deeper than max_depth are collapsed and only the first max_entries entries of each directory
+    are listed.  With summary, collapsed and left out entries are summarized by file type.
     """
-    contents = sorted(dir_path.iterdir())
+    contents = _scan(dir_path, exclude)
+    hidden = []
+    if max_entries is not None and len(contents) > max_entries:
+        contents, hidden = contents[:max_entries], contents[max_entries:]
     # contents each get pointers that are ├── with a final └── :
-    pointers = [tee] * (len(contents) - 1) + [last]
-    for pointer, path in zip(pointers, contents):
-        yield prefix + pointer + path.name
-        if path.is_dir(): # extend the prefix and recurse:
+    pointers = [tee] * (len(contents) - 1 + bool(hidden)) + [last]
+    for pointer, entry in zip(pointers, contents):
+        if not _is_dir(entry):
+            yield prefix + pointer + entry.name
+        elif max_depth is not None and max_depth <= 0:
+            collapsed = _scan(entry.path, exclude)
+            details = f' [{format_summary(tree_summary(collapsed, exclude))}]' if summary and collapsed else ''
+            yield prefix + pointer + entry.name + details
+        else:
+            yield prefix + pointer + entry.name
+            # extend the prefix and recurse:
             extension = branch if pointer == tee else space
             # i.e. space because last, └── , above so no more |
-            yield from tree(path, prefix=prefix+extension)
+            yield from tree(entry.path, prefix=prefix+extension, exclude=exclude,
+                            max_depth=None if max_depth is None else max_depth - 1,
+                            max_entries=max_entries, summary=summary)
+    if hidden:
+        details = f' [{format_summary(tree_summary(hidden, exclude))}]' if summary else ''
+        yield prefix + last + f'... {len(hidden)} more' + details
+
+
+def tree_dict(dir_path: Path, exclude=(), max_depth: int = None, max_entries: int = None) -> dict:
+    """The structure of a directory as nested dicts (JSON serializable), with the same options as tree.
+
+    Each directory has `name`, `type` ('dir'), `summary` (by file type, see tree_summary) and, unless it was
+    collapsed, `children` and `more` (the number of left out entries); files have `name`, `type` ('file')
+    and `bytes`.
+    """
+    dir_path = Path(dir_path)
+
+    def node(path, name, depth):
+        contents = _scan(path, exclude)
+        result = {'name': name, 'type': 'dir', 'summary': tree_summary(contents, exclude)}
+        if max_depth is not None and depth > max_depth:
+            return result
+        shown = contents if max_entries is None else contents[:max_entries]
+        result['children'] = [node(entry.path, entry.name, depth + 1) if _is_dir(entry)
+                              else {'name': entry.name, 'type': 'file', 'bytes': _size(entry)}
+                              for entry in shown]
+        result['more'] = len(contents) - len(shown)
+        return result
+
+    return node(dir_path, str(dir_path), 0)
 
 
 @contextmanager
@@ -52,8 +161,8 @@ def cwd(path):
         os.chdir(oldpwd)
 
 
-def run_notebook(notebook: Path, kernel: str, allow_errors=False):
-    """Executes and saves a jupyter notebook in its parent folder"""
+def run_notebook(notebook: Path, kernel: str = '', allow_errors=False):
+    """Executes and saves a jupyter notebook in its parent folder (kernel '' uses the notebook's kernel)"""
     import nbformat
     from nbconvert.preprocessors import ExecutePreprocessor, CellExecutionError
 
@@ -74,32 +183,19 @@ def run_notebook(notebook: Path, kernel: str, allow_errors=False):
 
 
 def update_example(folder=Path('example'), build_folder='.tex-build', run_nb=True, kernel='pycharm-baac2d74',
-                   tex_cmd='xelatex -synctex=1 -interaction=nonstopmode -output-directory={build_folder} {file}.tex'):
+                   engine='xelatex'):
     """Updates the example. Assumes working directory is the project directory."""
     from pdf2image import convert_from_path
+    from texpro.build import build_document
 
     assert Path('README.md').is_file(), 'not in main project directory (containing README.md)'
-    # make .tex-build folder
-    (folder / build_folder).mkdir(exist_ok=True)
 
     # run demo notebook
     if run_nb:
         run_notebook(folder / 'texpro_demo.ipynb', kernel=kernel, allow_errors=True)
 
-    # build document twice
-    tex_cmd = tex_cmd.format(build_folder=build_folder, file='texpro_demo')
-    run_args = dict(stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, text=True)
-    with cwd(folder):
-        for i in range(2):
-            result = subprocess.run(tex_cmd, **run_args)
-            if result.returncode != 0:
-                raise Exception('Error compiling document.\n'
-                                f'Command: {result.args}\n{result.stdout}')
-
-    # move pdf, delete build folder
-    pdf = folder / 'texpro_demo.pdf'
-    (folder / build_folder / 'texpro_demo.pdf').replace(pdf)
-    # (folder / build_folder).rmdir()
+    # build document (only if it or its assets changed) and copy the pdf next to it
+    pdf = build_document(folder / 'texpro_demo.tex', engine=engine, build_folder=build_folder).pdf
 
     # convert to image
     convert_from_path(pdf)[0].save(str(folder / 'texpro_demo.png'))
@@ -0,0 +1,213 @@
+"""Rebuilding LaTeX documents whenever the assets they include change, e.g. `python -m texpro watch paper.tex`"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .build import BuildResult, build_document, dependencies
+from .settings import config
+from .utils import excluded
+
+logger = logging.getLogger(__name__)
+
+Snapshot = Dict[Path, Tuple[int, int]]  # (mtime_ns, size) by file
+
+
+class Watcher:
+    """Watches documents, the files they include and the asset folders (config.asset_paths).
+
+    Changes are noticed by polling, which is woken up early by file system events (inotify etc.) if the
+    optional watchdog package is installed.  Bursts of changes (e.g. a notebook cell saving several assets)
+    are collected until no file has changed for `debounce` seconds, then only the documents that include a
+    changed file are rebuilt.  Keyword arguments are passed on to build_document.
+    """
+
+    def __init__(self, documents: Iterable[Union[str, Path]], folders: Iterable[Union[str, Path]] = None,
+                 interval: float = .1, debounce: float = .2, max_delay: float = 5., **build_kwargs):
+        self.documents = [self._document_path(document) for document in documents]
+        if folders is None:
+            folders = [config.abspath(path) for path in config.asset_paths] if config.doc_path is not None else []
+        self.folders = sorted({Path(folder).absolute() for folder in folders})
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.build_kwargs = build_kwargs
+        self.ignore = [*config._tree_exclude, build_kwargs.get('build_folder', '.tex-build'), '.*.tmp']
+        # including files that do not exist yet, so that creating them triggers a build
+        self.dependencies: Dict[Path, Set[Path]] = {document: dependencies(document, missing=True)
+                                                     for document in self.documents if document.is_file()}
+        self._first_change = None  # when the current burst of changes was noticed
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._observer = None
+        self._snapshot = self.scan()
+
+    @staticmethod
+    def _document_path(document) -> Path:
+        document = Path(document)
+        if not document.suffix:
+            document = document.with_suffix('.tex')
+        return config.abspath(document) if config.doc_path is not None else document.absolute()
+
+    def _scan_folder(self, folder: Path, snapshot: Snapshot):
+        try:
+            entries = list(os.scandir(folder))
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return
+        for entry in entries:
+            if excluded(entry, self.ignore):
+                continue
+            try:
+                if entry.is_dir():
+                    self._scan_folder(Path(entry.path), snapshot)
+                else:
+                    stat = entry.stat()
+                    snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                pass  # removed while scanning
+
+    def scan(self) -> Snapshot:
+        """Modification times and sizes of all watched files"""
+        snapshot = {}
+        for folder in self.folders:
+            self._scan_folder(folder, snapshot)
+        for path in [*self.documents, *(path for paths in self.dependencies.values() for path in paths)]:
+            if path not in snapshot:
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self) -> Set[Path]:
+        """Files that were added, changed or removed since the last call"""
+        snapshot = self.scan()
+        old = self._snapshot
+        self._snapshot = snapshot
+        changed = {path for path, stat in snapshot.items() if old.get(path) != stat}
+        return changed | (old.keys() - snapshot.keys())
+
+    def wait_for_changes(self, timeout: float = None) -> Set[Path]:
+        """Blocks until files changed and then stayed unchanged for `debounce` seconds (or until max_delay);
+        returns the changed files (an empty set after the timeout or stop())"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed = set()
+        while not changed:
+            if self._stopped.is_set() or (deadline is not None and time.monotonic() >= deadline):
+                return set()
+            self._sleep(self.interval)
+            changed = self.changes()
+        first = last = self._first_change = time.monotonic()
+        while time.monotonic() - last < self.debounce and time.monotonic() - first < self.max_delay:
+            time.sleep(min(self.interval, self.debounce))
+            more = self.changes()
+            if more:
+                changed |= more
+                last = time.monotonic()
+        return changed
+
+    def _sleep(self, seconds: float):
+        # with watchdog, poll rarely and wake up on events instead
+        if self._observer is not None:
+            seconds = max(seconds, 1.)
+        self._wakeup.wait(seconds)
+        self._wakeup.clear()
+
+    def affected(self, changed: Set[Path]) -> List[Path]:
+        """The documents that are or include one of the changed files"""
+        return [document for document in self.documents
+                if document in changed or self.dependencies.get(document, set()) & changed]
+
+    def rebuild(self, documents: Iterable[Path]) -> Dict[Path, Optional[BuildResult]]:
+        """Builds the documents and updates their dependencies; a failed build is logged and gives None"""
+        results = {}
+        for document in documents:
+            try:
+                results[document] = build_document(document, **self.build_kwargs)
+            except Exception as e:
+                logger.error(f'Building {document.name} failed: {e}')
+                results[document] = None
+            self.dependencies[document] = dependencies(document, missing=True) if document.is_file() else set()
+        # watch new dependencies from now on (a full scan could miss changes made while building)
+        for path in set().union(*self.dependencies.values()) - self._snapshot.keys():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            self._snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return results
+
+    def check(self, timeout: float = None) -> Dict[Path, Optional[BuildResult]]:
+        """Waits for changes, then rebuilds the affected documents and reports how long it took"""
+        changed = self.wait_for_changes(timeout)
+        if not changed:
+            return {}
+        start = time.monotonic()
+        waited = start - self._first_change
+        documents = self.affected(changed)
+        if not documents:
+            logger.debug(f'{len(changed)} changed files are not included by any document')
+            return {}
+        results = self.rebuild(documents)
+        names = ', '.join(sorted(path.name for path in changed)[:5]) + (', ...' if len(changed) > 5 else '')
+        for document, result in results.items():
+            if result is not None:
+                logger.info(f'Built {document.name} in {time.monotonic() - start:.2f}s '
+                            f'({time.monotonic() - start + waited:.2f}s after changes to {names})')
+        return results
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return
+        wakeup = self._wakeup
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wakeup.set()
+
+        self._observer = Observer()
+        for folder in {*self.folders, *(document.parent for document in self.documents)}:
+            if folder.is_dir():
+                self._observer.schedule(Handler(), str(folder), recursive=True)
+        self._observer.start()
+
+    def run(self, timeout: float = None):
+        """Builds the documents (if needed), then rebuilds them on changes until stop() (or the timeout)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._start_observer()
+        try:
+            for document, result in self.rebuild(self.documents).items():
+                if result is not None:
+                    logger.info(f'{document.name} is up to date' if not result.compiled
+                                else f'Built {document.name} in {result.seconds:.2f}s')
+            logger.info(f'Watching {len(self.documents)} documents and {len(self.folders)} folders')
+            while not self._stopped.is_set():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.check(remaining)
+        finally:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer.join()
+                self._observer = None
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+
+def watch(*documents: Union[str, Path], **kwargs):
+    """Rebuilds the documents whenever a file they include changes, until interrupted (see Watcher)"""
+    watcher = Watcher(documents, **kwargs)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass